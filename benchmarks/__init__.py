@@ -0,0 +1,3 @@
+"""
+morphit benchmarks, run from the repo root: python -m benchmarks.<name>
+"""
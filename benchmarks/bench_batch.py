@@ -0,0 +1,39 @@
+"""
+Per-record Parser vs compiled template vs Parser.batch column conversion.
+"""
+
+import json
+from morphit import Parser
+from .common import measure, report
+
+N = 5000
+
+TEMPLATE = {
+  'price': float,
+  'count': int,
+  'active': bool,
+  'name': str,
+  'levels': {'a': 1.0, 'b': 1.0},
+}
+
+RAW = json.dumps([{
+  'price': '%d.25' % i,
+  'count': i,
+  'active': 't' if i % 2 else 'f',
+  'name': i,
+  'levels': {'a': str(i), 'b': i},
+} for i in range(N)])
+
+def main():
+  compiled = Parser.compile(TEMPLATE)
+  make = lambda: json.loads(RAW)
+  rows = [
+    ('Parser', measure(lambda recs: [Parser(TEMPLATE, r) for r in recs], make), N),
+    ('Parser.compile', measure(lambda recs: [compiled(r) for r in recs], make), N),
+    ('Parser.batch', measure(lambda recs: Parser.batch(TEMPLATE, recs), make), N),
+    ('Parser.batch columns', measure(lambda recs: Parser.batch(TEMPLATE, recs, columns=True), make), N),
+  ]
+  report('%d records' % N, rows, baseline='Parser')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,37 @@
+"""
+Per-call cost of Processor chains as they get longer and more deeply nested.
+Processor.flow nests one Processor per step, the chain optimizer flattens
+them so the cost should follow the number of real steps only.
+"""
+
+from morphit import Processor
+from .common import measure, report
+
+N = 20000
+
+def double(x):
+  return x * 2
+
+def nested(depth):
+  p = Processor(float)
+  for _ in range(depth):
+    p = Processor(p).then(lambda x: x)
+  return p.then(double)
+
+CASES = [
+  ('flow x2 [float, int]', Processor.flow([float, int])),
+  ('flow x10 types', Processor.flow([str, float, int] * 3 + [float])),
+  ('flow x10 types/funcs', Processor.flow([float, double, int, None, lambda x: x] * 2)),
+  ('nested depth 1', nested(1)),
+  ('nested depth 10', nested(10)),
+  ('nested depth 50', nested(50)),
+]
+
+def main():
+  rows = []
+  for name, proc in CASES:
+    rows.append((name, measure(lambda _: [proc('1.5') for _ in range(N)]), N))
+  report('Processor(var)', rows)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,55 @@
+"""
+Parser(template, record) vs Parser.compile(template)(record) on nested templates.
+"""
+
+import json
+from morphit import Parser, Instances
+from .common import measure, report
+
+N = 2000
+
+FLAT = {
+  'amount': 0.66075377,
+  'price': float,
+  'count': int,
+  'active': bool,
+  'id': None,
+  'datetime': Instances['datetime'],
+}
+
+NESTED = {
+  'ticker': FLAT,
+  'history': [{'price': float, 'count': int}],
+  'tags': [str],
+  'meta': {'source': str, 'raw': (str,), 'levels': {'a': 1.0, 'b': 1.0}},
+}
+
+FLAT_RECORD = {
+  'amount': '0.66075377',
+  'price': '$10,000.00',
+  'count': '12.0',
+  'active': 't',
+  'id': None,
+  'datetime': 1517408265547,
+}
+
+NESTED_RECORD = json.dumps({
+  'ticker': FLAT_RECORD,
+  'history': [{'price': '%d.5' % i, 'count': i} for i in range(10)],
+  'tags': ['a', 1, 2.0],
+  'meta': {'source': 1, 'raw': [1, 2, 3], 'levels': {'a': '1', 'b': 2}},
+})
+
+def run(template, raw):
+  compiled = Parser.compile(template)
+  make = lambda: [json.loads(raw) for _ in range(N)]
+  parser = measure(lambda recs: [Parser(template, r) for r in recs], make)
+  fast = measure(lambda recs: [compiled(r) for r in recs], make)
+  return [('Parser', parser, N), ('Parser.compile', fast, N)]
+
+def main():
+  report('flat template', run(FLAT, json.dumps(FLAT_RECORD)), baseline='Parser')
+  report('nested template', run(NESTED, NESTED_RECORD), baseline='Parser')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,26 @@
+"""
+Date string parsing: iso8601.parse_date vs DateParser, with and without a cache.
+"""
+
+import random, iso8601
+from morphit import DateParser
+from .common import measure, report
+
+N = 20000
+
+def main():
+  random.seed(1)
+  # Event data: one format, a lot of repeated values
+  values = ['2018-01-%02dT06:%02d:45.547Z' % (random.randint(1, 28), random.randint(0, 9)) for _ in range(N)]
+  plain = DateParser()
+  cached = DateParser(cache=1024)
+  rows = [
+    ('iso8601.parse_date', measure(lambda _: [iso8601.parse_date(v) for v in values]), N),
+    ('DateParser', measure(lambda _: [plain(v) for v in values]), N),
+    ('DateParser(cache=1024)', measure(lambda _: [cached(v) for v in values]), N),
+  ]
+  report('%d iso8601 strings' % N, rows, baseline='iso8601.parse_date')
+  print('cache hit rate %.2f' % cached.cacheInfo().hitrate)
+
+if __name__ == '__main__':
+  main()
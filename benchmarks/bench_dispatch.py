@@ -0,0 +1,44 @@
+"""
+Per-call cost of the most common conversions from the README matrix, with
+both instance and type bases.
+"""
+
+from datetime import datetime
+from morphit import Parser, Instances
+from .common import measure, report
+
+N = 20000
+
+CASES = [
+  ('str[float] -> float', 1.0, '150.0'),
+  ('str[float] -> type(float)', float, '150.0'),
+  ('str[int] -> int', 1, '150'),
+  ('str[int] -> type(int)', int, '150'),
+  ('str -> bool', True, 't'),
+  ('str -> type(bool)', bool, 't'),
+  ('int -> str', '', 6),
+  ('int -> type(str)', str, 6),
+  ('float -> float', 1.0, 6.4),
+  ('float -> type(float)', float, 6.4),
+  ('none -> str', '', None),
+  ('float -> datetime', Instances['datetime'], 1575693119.329921),
+  ('int -> datetime', Instances['datetime'], 1575693119329),
+  ('str[iso8601] -> datetime', Instances['datetime'], '2018-01-31T06:17:45.547'),
+  ('datetime -> str', '', datetime(2018, 1, 31, 6, 17, 45, 547000)),
+  ('datetime -> type(str)', str, datetime(2018, 1, 31, 6, 17, 45, 547000)),
+  ('datetime -> int', int, datetime(2018, 1, 31, 6, 17, 45, 547000)),
+  ('dict -> str[json]', str, {'a': {'b': 1}}),
+  ('str -> dict', dict, '{"a": 1}'),
+  ('str[python] -> list', list, "['photo', 2, 'pic']"),
+  ('list -> tuple', tuple, [1, 2, 3]),
+  ('int -> list', [], 6),
+]
+
+def main():
+  rows = []
+  for name, base, var in CASES:
+    rows.append((name, measure(lambda _: [Parser(base, var) for _ in range(N)]), N))
+  report('Parser(base, var)', rows)
+
+if __name__ == '__main__':
+  main()
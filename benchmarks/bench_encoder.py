@@ -0,0 +1,46 @@
+"""
+JSON encoding of datetime heavy payloads: stdlib with a default hook,
+morphit.JSONEncoder, and an encoder compiled from the payload template.
+"""
+
+import json
+from datetime import datetime, date, timedelta
+from morphit import JSONEncoder, Instances
+from .common import measure, report
+
+N = 2000
+
+TEMPLATE = {
+  'id': int,
+  'created': Instances['datetime'],
+  'updated': Instances['datetime'],
+  'day': date,
+  'price': float,
+  'events': [{'at': Instances['datetime'], 'kind': str}],
+}
+
+START = datetime(2018, 1, 31, 6, 17, 45, 547000)
+RECORDS = [{
+  'id': i,
+  'created': START + timedelta(seconds=i),
+  'updated': START + timedelta(seconds=i, microseconds=i),
+  'day': (START + timedelta(days=i % 30)).date(),
+  'price': i * 1.5,
+  'events': [{'at': START + timedelta(minutes=j), 'kind': 'view'} for j in range(5)],
+} for i in range(N)]
+
+def isoformat(o):
+  return o.isoformat()
+
+def main():
+  rows = [
+    ('json.dumps default=isoformat', measure(lambda _: [json.dumps(r, default=isoformat) for r in RECORDS]), N),
+    ('json.dumps cls=JSONEncoder', measure(lambda _: [json.dumps(r, cls=JSONEncoder) for r in RECORDS]), N),
+  ]
+  if hasattr(JSONEncoder, 'compile'):
+    encode = JSONEncoder.compile(TEMPLATE)
+    rows.append(('JSONEncoder.compile', measure(lambda _: [encode(r) for r in RECORDS]), N))
+  report('%d records, 7 datetimes each' % N, rows, baseline='json.dumps default=isoformat')
+
+if __name__ == '__main__':
+  main()
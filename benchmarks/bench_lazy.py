@@ -0,0 +1,32 @@
+"""
+Wide records read a few fields at a time: eager Parser.compile vs lazy
+proxies that convert only the fields that are read.
+"""
+
+import json
+from morphit import Parser
+from .common import measure, report
+
+N = 5000
+WIDTH = 200
+READ = ['f1', 'f50', 'f100', 'f150', 'f199']
+
+TEMPLATE = dict(('f%d' % k, [int, float, bool, str][k % 4]) for k in range(WIDTH))
+RAW = json.dumps([dict(('f%d' % k, str(i + k)) for k in range(WIDTH)) for i in range(N)])
+
+def main():
+  make = lambda: json.loads(RAW)
+  eager = Parser.compile(TEMPLATE)
+  copying = Parser.compile(TEMPLATE, inplace=False)
+  lazy = Parser.compile(TEMPLATE, lazy=True)
+  read = lambda convert: lambda recs: [[r[k] for k in READ] for r in map(convert, recs)]
+  rows = [
+    ('eager', measure(read(eager), make, repeat=3), N),
+    ('eager inplace=False', measure(read(copying), make, repeat=3), N),
+    ('lazy', measure(read(lazy), make, repeat=3), N),
+    ('lazy + materialize', measure(lambda recs: [lazy(r).materialize() for r in recs], make, repeat=3), N),
+  ]
+  report('%d records of %d fields, %d fields read' % (N, WIDTH, len(READ)), rows, baseline='eager')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,50 @@
+"""
+List/dict string loading, the old replace + json.loads path vs literals.loads
+on 1KB to 10MB payloads.
+"""
+
+import json
+from morphit.literals import loads
+from .common import measure, report
+
+SIZES = [1 << 10, 1 << 17, 1 << 20, 10 << 20]
+
+FORMS = {
+  'json':    '{"name": "photo%d", "n": 2, "f": 1.5, "tags": ["a", "b"]}',
+  'python':  "{'name': 'photo%d', 'n': 2, 'f': 1.5, 'tags': ['a', 'b']}",
+  'unicode': "{u'name': u'photo%d', u'n': 2, u'f': 1.5, u'tags': [u'a', u'b']}",
+  # Needs the tokenizer, the replace path can't load these at all
+  'escaped': "{'name': 'it\\'s photo%d', 'n': None, 'tags': ('a', 'b')}",
+}
+
+def legacy(var):
+  return json.loads(var.replace("u'", '"').replace("'", '"'))
+
+def payload(item, size):
+  parts, total, i = [], 0, 0
+  while total < size:
+    part = item % i
+    parts.append(part)
+    total += len(part) + 2
+    i += 1
+  return '[' + ', '.join(parts) + ']'
+
+def main():
+  for size in SIZES:
+    rows = []
+    repeat = 5 if size < (1 << 20) else 1
+    for form, item in FORMS.items():
+      text = payload(item, size)
+      try:
+        legacy(text)
+        rows.append(('%s replace+json.loads' % form, measure(lambda _: legacy(text), repeat=repeat), 1))
+      except ValueError:
+        rows.append(('%s replace+json.loads' % form, float('inf'), 1))
+      rows.append(('%s loads' % form, measure(lambda _: loads(text), repeat=repeat), 1))
+    print('%d bytes' % size)
+    for name, seconds, _ in rows:
+      print('  %-32s %s' % (name, 'fails' if seconds == float('inf') else '%9.3f ms' % (seconds * 1e3)))
+    print('')
+
+if __name__ == '__main__':
+  main()
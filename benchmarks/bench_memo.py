@@ -0,0 +1,36 @@
+"""
+Feeds that repeat a small set of values: compiled templates with and without
+Memo on every field.
+"""
+
+import random
+from datetime import datetime
+from morphit import Parser, Memo, NumberFormats
+from .common import measure, report
+
+N = 50000
+
+STATUS = ['t', 'f', 'True', '1']
+DATES = ['2018-01-%02dT06:17:45Z' % d for d in range(1, 31)]
+PRICES = ['$%d,200.00' % i for i in range(20)]
+
+TEMPLATE = {'active': bool, 'at': datetime, 'price': NumberFormats['us']}
+MEMO = dict((k, Memo(v, size=256)) for k, v in TEMPLATE.items())
+
+def make():
+  rnd = random.Random(1)
+  return [{'active': rnd.choice(STATUS), 'at': rnd.choice(DATES), 'price': rnd.choice(PRICES)} for _ in range(N)]
+
+def main():
+  plain = Parser.compile(TEMPLATE)
+  memo = Parser.compile(MEMO)
+  rows = [
+    ('Parser.compile', measure(lambda records: [plain(r) for r in records], make), N),
+    ('Parser.compile + Memo', measure(lambda records: [memo(r) for r in records], make), N),
+  ]
+  report('%d records, 4 statuses, 30 dates, 20 prices' % N, rows, baseline='Parser.compile')
+  for k, m in MEMO.items():
+    print('%-10s hit rate %.3f' % (k, m.cacheInfo().hitrate))
+
+if __name__ == '__main__':
+  main()
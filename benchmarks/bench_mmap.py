@@ -0,0 +1,48 @@
+"""
+Random access to a JSON-lines export: Processor.open (memory mapped, offset
+index) vs reading every line into a list, and vs re-streaming up to the line.
+"""
+
+import os, json, random, tempfile
+from morphit import Processor
+from .common import measure, report, peak
+
+N = 200000
+SAMPLE = 1000
+
+def main():
+  fd, path = tempfile.mkstemp(suffix='.jsonl')
+  with os.fdopen(fd, 'w') as fh:
+    for i in range(N):
+      fh.write(json.dumps({'id': str(i), 'price': '$%d.50' % i, 'name': 'item %d' % i}) + '\n')
+  processor = Processor({'id': int, 'price': float})
+  picks = random.Random(1).sample(range(N), SAMPLE)
+  try:
+    def readlines(_):
+      with open(path, 'rb') as fh:
+        return fh.readlines()
+    lines = readlines(None)
+    records = processor.open(path)
+    processor.open(path, index=True).close()
+    rows = [
+      ('index build', measure(lambda _: processor.open(path).close(), repeat=3), N),
+      ('saved index', measure(lambda _: processor.open(path, index=True).close(), repeat=3), N),
+      ('readlines', measure(readlines, repeat=3), N),
+    ]
+    report('open %d lines (%.1f MB)' % (N, os.path.getsize(path) / 1e6), rows, baseline='readlines')
+    print()
+    rows = [
+      ('lines list + json.loads', measure(lambda _: [processor(json.loads(lines[i])) for i in picks]), SAMPLE),
+      ('Processor.open', measure(lambda _: [records[i] for i in picks]), SAMPLE),
+    ]
+    report('%d random records' % SAMPLE, rows, baseline='lines list + json.loads')
+    print()
+    print('%-32s %10.1f MB' % ('readlines memory', peak(readlines) / 1e6))
+    print('%-32s %10.1f MB' % ('index memory', peak(lambda _: processor.open(path)) / 1e6))
+    records.close()
+  finally:
+    os.remove(path)
+    os.remove(path + '.idx')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,38 @@
+"""
+Processor.map scaling over 1/2/4/8 worker processes.
+"""
+
+import json, os
+from morphit import Processor, Instances
+from .common import measure, report
+
+N = 20000
+
+PROCESSOR = Processor({
+  'price': float,
+  'count': int,
+  'active': bool,
+  'when': Instances['datetime'],
+  'tags': [str],
+  'x10': lambda x: int(x) * 10,
+})
+
+RAW = json.dumps([{
+  'price': '$%d.25' % i,
+  'count': '%d.0' % i,
+  'active': 't',
+  'when': '2018-01-31T06:17:45.547',
+  'tags': "['a', 'b', %d]" % i,
+  'x10': i,
+} for i in range(N)])
+
+def main():
+  make = lambda: json.loads(RAW)
+  rows = []
+  for workers in (1, 2, 4, 8):
+    seconds = measure(lambda recs: PROCESSOR.map(recs, workers=workers), make, repeat=3)
+    rows.append(('workers=%d' % workers, seconds, N))
+  report('Processor.map, %d records, %d cpus' % (N, os.cpu_count()), rows, baseline='workers=1')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,38 @@
+"""
+Wide dict templates against sparse records: per-shape plans vs checking every
+template key on every record (PLAN_MIN raised past the template width).
+"""
+
+import random
+from morphit import Parser
+from morphit import compiler
+from .common import measure, report
+
+N = 20000
+SHAPES = 20
+
+def make(width, present):
+  rnd = random.Random(width)
+  shapes = [rnd.sample(range(width), min(width, present)) for _ in range(SHAPES)]
+  extra = dict(('x%d' % k, k) for k in range(max(0, present - width)))
+  return lambda: [dict([('f%d' % k, str(i)) for k in shapes[i % SHAPES]], **extra) for i in range(N)]
+
+def main():
+  for width, present in ((32, 8), (100, 5), (500, 5), (500, 100), (32, 200)):
+    template = dict(('f%d' % k, int if k % 2 else float) for k in range(width))
+    records = make(width, present)
+    planned = Parser.compile(template)
+    default, compiler.PLAN_MIN = compiler.PLAN_MIN, width + 1
+    try:
+      checked = Parser.compile(template)
+    finally:
+      compiler.PLAN_MIN = default
+    rows = [
+      ('every key', measure(lambda recs: [checked(r) for r in recs], records), N),
+      ('shape plans', measure(lambda recs: [planned(r) for r in recs], records), N),
+    ]
+    report('%d key template, %d keys per record, %d shapes' % (width, present, SHAPES), rows, baseline='every key')
+    print()
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,32 @@
+"""
+Record output: dict templates vs the __slots__ and namedtuple record classes
+built from the same template. Construction speed through Parser.batch on
+JSON-lines input, and the memory held by the converted rows.
+"""
+
+import json
+from morphit import Parser
+from .common import measure, report, peak
+
+N = 100000
+
+TEMPLATE = {'id': int, 'price': float, 'qty': int, 'name': str, 'active': bool}
+Slots = Parser.record(TEMPLATE, 'Slots')
+Tuple = Parser.record(TEMPLATE, 'Tuple', kind='tuple')
+
+LINES = [json.dumps({'id': str(i), 'price': '%d.5' % i, 'qty': i % 7, 'name': 'item', 'active': 't'}) for i in range(N)]
+
+def main():
+  rows = []
+  sizes = []
+  for name, template in (('dict', TEMPLATE), ('slots record', Slots), ('namedtuple record', Tuple)):
+    run = lambda _, t=template: Parser.batch(t, LINES)
+    rows.append((name, measure(run, repeat=3), N))
+    sizes.append((name, peak(run)))
+  report('Parser.batch, %d JSON lines of 5 fields' % N, rows, baseline='dict')
+  print()
+  for name, size in sizes:
+    print('%-32s %10.1f MB %8.0f B/record' % (name, size / 1e6, size / N))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,57 @@
+"""
+Processor.map scaling on threads vs processes, and a frozen Processor vs a
+plain one on a single thread. Run it on a regular and on a free-threaded
+(python3.13t) build: with the GIL threads can't scale, without it they
+should come close to processes without any pickling.
+"""
+
+import os, sys, json, sysconfig
+from morphit import Processor, Instances
+from .common import measure, report
+
+N = 20000
+
+TEMPLATE = {
+  'price': float,
+  'count': int,
+  'active': bool,
+  'when': Instances['datetime'],
+  'tags': [str],
+  'x10': lambda x: int(x) * 10,
+}
+
+RAW = json.dumps([{
+  'price': '$%d.25' % i,
+  'count': '%d.0' % i,
+  'active': 't',
+  'when': '2018-01-31T06:17:45.547',
+  'tags': "['a', 'b', %d]" % i,
+  'x10': i,
+} for i in range(N)])
+
+def build():
+  if not sysconfig.get_config_var('Py_GIL_DISABLED'):
+    return 'GIL'
+  gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+  return 'free-threaded, GIL %s' % ('re-enabled' if gil else 'disabled')
+
+def main():
+  make = lambda: json.loads(RAW)
+  processor = Processor(TEMPLATE)
+  frozen = processor.freeze()
+  rows = [
+    ('Processor', measure(lambda recs: [processor(r) for r in recs], make, repeat=3), N),
+    ('FrozenProcessor', measure(lambda recs: [frozen(r) for r in recs], make, repeat=3), N),
+  ]
+  report('single thread, %d records' % N, rows, baseline='Processor')
+  print()
+  rows = []
+  for executor in ('thread', 'process'):
+    for workers in (1, 2, 4, 8):
+      run = lambda recs: processor.map(recs, workers=workers, executor=executor)
+      rows.append(('%s workers=%d' % (executor, workers), measure(run, make, repeat=3), N))
+  report('Processor.map, %d records, %d cpus, %s build' % (N, os.cpu_count(), build()), rows,
+         baseline='thread workers=1')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,33 @@
+"""
+Whole-sequence conversion: Parser([base], values) element by element vs
+Parser.array with the numpy kernels (when numpy is installed).
+"""
+
+from datetime import datetime
+from morphit import Parser
+from morphit.vectorized import available
+from .common import measure, report
+
+N = 200000
+
+CASES = [
+  ('str -> float', float, ['%d.25' % i for i in range(N)]),
+  ('currency str -> float', float, ['$%d,000.25' % i if i % 10 == 0 else '%d.25' % i for i in range(N)]),
+  ('str -> int', int, [str(i) for i in range(N)]),
+  ('str -> bool', bool, ['t' if i % 2 else 'f' for i in range(N)]),
+  ('ms epoch -> datetime', datetime, [1517408265547 + i for i in range(N)]),
+]
+
+def main():
+  for title, base, values in CASES:
+    rows = [
+      ('Parser([base])', measure(lambda _: Parser([base], list(values)), repeat=3), N),
+      ('Parser.array python', measure(lambda _: Parser.array(base, values, engine='python'), repeat=3), N),
+    ]
+    if available():
+      rows.append(('Parser.array numpy', measure(lambda _: Parser.array(base, values), repeat=3), N))
+    report('%s, %d values' % (title, N), rows, baseline='Parser([base])')
+    print()
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,42 @@
+"""
+Small timing helpers shared by the benchmark scripts.
+"""
+
+import time
+import tracemalloc
+
+def measure(run, make=None, repeat=5):
+  """
+  Best wall time of run(inputs) over repeat runs, in seconds.
+  make() builds fresh inputs outside the timed section (Parser mutates dicts).
+  """
+  best = None
+  for _ in range(repeat):
+    inputs = make() if make else None
+    start = time.perf_counter()
+    run(inputs)
+    took = time.perf_counter() - start
+    best = took if best is None else min(best, took)
+  return best
+
+def peak(run, make=None):
+  """Peak bytes allocated by one run(inputs), inputs built before tracing starts"""
+  inputs = make() if make else None
+  tracemalloc.start()
+  try:
+    run(inputs)
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+def report(title, rows, baseline=None):
+  """Print rows of (name, seconds, count) with ops/s and speedup vs baseline"""
+  print(title)
+  print('-' * len(title))
+  base = dict((r[0], r[1]) for r in rows).get(baseline)
+  for name, seconds, count in rows:
+    line = '%-32s %10.0f ops/s %8.2f us/op' % (name, count / seconds, seconds * 1e6 / count)
+    if base:
+      line += '  x%.2f' % (base / seconds)
+    print(line)
+  print('')
@@ -0,0 +1,234 @@
+"""
+Benchmark suite: one micro benchmark per conversion of the README matrix and
+macro benchmarks for nested templates, Processor chains and large lists.
+
+  python -m benchmarks.suite --out before.json
+  python -m benchmarks.suite --out after.json --filter datetime
+  python -m benchmarks.suite compare before.json after.json --threshold 0.1
+
+Results are JSON: environment info and, per case, ops/s, us/op and the peak
+bytes traced during one run (tracemalloc, measured in a separate untimed run).
+Cases that raise are recorded with their error instead of a timing. compare
+exits with status 1 when a case lost more than threshold of its throughput,
+grew its peak memory by more than threshold, or started failing.
+"""
+
+import sys, json, copy, time, platform, argparse
+from datetime import datetime, date, time as dtime
+from morphit import Parser, Processor, Instances, __version__
+from .common import measure, peak
+
+DT = datetime(2018, 1, 31, 6, 17, 45, 547000)
+
+# (name, base, var) for every line of the README conversion matrix
+MATRIX = [
+  ('any -> list', [], {1, 2, 3}),
+  ('any -> object', {}, '{"a": 1}'),
+  ('any -> tuple', (), 6),
+  ('any -> type', float, '1.5'),
+  ('any -> str', '', 6),
+  ('dict -> str[json]', '', {'a': {'b': 1}}),
+  ('dict -> dict', {'a': float, 'b': {'c': int}}, {'a': '1.5', 'b': {'c': '2'}}),
+  ('dict -> list', [], {'a': 1, 'b': 2}),
+  ('dict -> tuple', (), {'a': 1, 'b': 2}),
+  ('datetime -> str', '', DT),
+  ('datetime -> str[json]', '', {'t': DT}),
+  ('datetime -> int', int, DT),
+  ('datetime -> float', float, DT),
+  ('datetime.time -> str', '', dtime(6, 17, 45, 547000)),
+  ('datetime.date -> str', '', date(2018, 1, 31)),
+  ('float -> str', '', 6.4),
+  ('float -> float', 1.0, 6.4),
+  ('float -> list', [], 6.4),
+  ('float -> tuple', (), 6.4),
+  ('float -> type', int, 6.4),
+  ('float -> datetime', Instances['datetime'], 1575693119.329921),
+  ('int -> str', '', 6),
+  ('int -> int', 1, 6),
+  ('int -> list', [], 6),
+  ('int -> tuple', (), 6),
+  ('int -> datetime', Instances['datetime'], 1575693119329),
+  ('int -> type', float, 6),
+  ('list -> str[json]', '', [1, 'a', 2.5]),
+  ('list -> list', [int], ['1', '2', '3']),
+  ('list -> tuple', (), [1, 2, 3]),
+  ('tuple -> str[json[list]]', '', (1, 'a', 2.5)),
+  ('tuple -> list', [], (1, 2, 3)),
+  ('tuple -> tuple', (int,), ('1', '2')),
+  ('none -> str', '', None),
+  ('none -> bool', True, None),
+  ('none -> list', [], None),
+  ('none -> tuple', (), None),
+  ('str -> bool', True, 't'),
+  ('str -> datetime', Instances['datetime'], '1517408265547'),
+  ('str -> dict', dict, '{"a": 1, "b": [1, 2]}'),
+  ('str -> list', [], '[1, 2, 3]'),
+  ('str -> tuple', (), '[1, 2, 3]'),
+  ('str[int] -> float', 1.0, '150'),
+  ('str[int] -> int', 1, '150'),
+  ('str[float] -> float', 1.0, '150.5'),
+  ('str[float] -> int', 1, '150.5'),
+  ('str -> type', int, '150'),
+  ('str[iso8601] -> datetime', Instances['datetime'], '2018-01-31T06:17:45.547'),
+  ('str[iso8601] -> float', 1.0, '2018-01-31T06:17:45.547'),
+  ('str[unicode] -> list', [], "[u'photo', u'pic']"),
+  ('str[python] -> list', [], "['photo', 2, 'pic', None]"),
+]
+
+FLAT = {
+  'price': float,
+  'count': int,
+  'active': bool,
+  'name': str,
+  'at': Instances['datetime'],
+}
+
+NESTED = {
+  'ticker': FLAT,
+  'history': [{'price': float, 'count': int}],
+  'tags': [str],
+  'meta': {'source': str, 'levels': {'a': 1.0, 'b': 1.0}},
+}
+
+def record(i):
+  flat = {'price': '%d.25'%i, 'count': str(i), 'active': 't', 'name': i, 'at': 1517408265547 + i}
+  return {
+    'ticker': flat,
+    'history': [{'price': '%d.5'%j, 'count': j} for j in range(10)],
+    'tags': ['a', 1, 2.0],
+    'meta': {'source': 1, 'levels': {'a': '1', 'b': 2}},
+  }
+
+def double(x):
+  return x * 2
+
+# (name, run(inputs), make() -> inputs, ops per run)
+def macros():
+  records = json.dumps([record(i) for i in range(500)])
+  compiled = Parser.compile(NESTED)
+  flow = Processor.flow([str, float, double, int, str, float])
+  nested = Processor(float)
+  for _ in range(10):
+    nested = Processor(nested).then(double)
+  values = json.dumps([str(i) for i in range(20000)])
+  return [
+    ('nested template Parser', lambda recs: [Parser(NESTED, r) for r in recs], lambda: json.loads(records), 500),
+    ('nested template compiled', lambda recs: [compiled(r) for r in recs], lambda: json.loads(records), 500),
+    ('nested template batch', lambda recs: Parser.batch(NESTED, recs), lambda: json.loads(records), 500),
+    ('Processor flow x6', lambda _: [flow(i) for i in range(5000)], None, 5000),
+    ('Processor nested x10', lambda _: [nested(i) for i in range(5000)], None, 5000),
+    ('large list Parser', lambda vs: Parser([float], vs), lambda: json.loads(values), 20000),
+    ('large list compiled', Parser.compile([float]), lambda: json.loads(values), 20000),
+    ('large list from str', lambda _: Parser([], values), None, 20000),
+  ]
+
+def micros(n):
+  cases = []
+  for name, base, var in MATRIX:
+    # Parser mutates dicts and lists, every call gets its own copy
+    if isinstance(var, (dict, list)):
+      make = lambda var=var: [copy.deepcopy(var) for _ in range(n)]
+    else:
+      make = lambda var=var: [var] * n
+    run = lambda vars, base=base: [Parser(base, v) for v in vars]
+    cases.append((name, run, make, n))
+  return cases
+
+def runCase(run, make, ops, repeat):
+  try:
+    seconds = measure(run, make, repeat)
+    return {'ops': ops / seconds, 'us': seconds * 1e6 / ops, 'peak': peak(run, make)}
+  except Exception as e:
+    return {'error': '%s: %s'%(type(e).__name__, e)}
+
+def runSuite(n=2000, repeat=5, only=None, log=None):
+  results = {}
+  for name, run, make, ops in micros(n) + macros():
+    if only and only not in name:
+      continue
+    results[name] = res = runCase(run, make, ops, repeat)
+    if log:
+      log(name, res)
+  return {
+    'meta': {
+      'morphit': __version__,
+      'python': platform.python_version(),
+      'implementation': platform.python_implementation(),
+      'platform': platform.platform(),
+      'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+      'n': n,
+      'repeat': repeat,
+    },
+    'results': results,
+  }
+
+def compare(old, new, threshold=0.1):
+  """Rows of (name, old, new, flags), flags lists the regressions of a case"""
+  rows = []
+  for name, after in new['results'].items():
+    before = old['results'].get(name)
+    if before is None:
+      continue
+    flags = []
+    if 'error' in after:
+      if 'error' not in before:
+        flags.append('fails')
+    elif 'error' not in before:
+      if after['ops'] < before['ops'] * (1 - threshold):
+        flags.append('throughput')
+      # Ignore peaks below 1KB, allocator noise
+      if after['peak'] > max(before['peak'] * (1 + threshold), before['peak'] + 1024):
+        flags.append('memory')
+    rows.append((name, before, after, flags))
+  return rows
+
+def printResult(name, res):
+  if 'error' in res:
+    print('%-32s %s'%(name, res['error']))
+  else:
+    print('%-32s %10.0f ops/s %8.2f us/op %10d B peak'%(name, res['ops'], res['us'], res['peak']))
+
+def printComparison(rows):
+  regressions = 0
+  for name, before, after, flags in rows:
+    if 'error' in before or 'error' in after:
+      line = '%-32s %s -> %s'%(name, before.get('error', 'ok'), after.get('error', 'ok'))
+    else:
+      line = '%-32s %10.0f -> %10.0f ops/s x%.2f  peak %d -> %d B'%(
+        name, before['ops'], after['ops'], after['ops'] / before['ops'], before['peak'], after['peak'])
+    if flags:
+      regressions += 1
+      line += '  REGRESSION: %s'%', '.join(flags)
+    print(line)
+  print('')
+  print('%d regression(s) in %d cases'%(regressions, len(rows)))
+  return regressions
+
+def main(argv=None):
+  argv = sys.argv[1:] if argv is None else argv
+  if argv[:1] == ['compare']:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite compare')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv[1:])
+    with open(args.old) as fh:
+      old = json.load(fh)
+    with open(args.new) as fh:
+      new = json.load(fh)
+    return 1 if printComparison(compare(old, new, args.threshold)) else 0
+
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+  parser.add_argument('--out', help='write the results to this JSON file')
+  parser.add_argument('--filter', help='only run cases whose name contains this')
+  parser.add_argument('-n', type=int, default=2000, help='calls per micro benchmark run')
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+  results = runSuite(args.n, args.repeat, args.filter, printResult)
+  if args.out:
+    with open(args.out, 'w') as fh:
+      json.dump(results, fh, indent=2, sort_keys=True)
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
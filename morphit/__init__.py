@@ -3,5 +3,24 @@ from .utils import Processor
 from .utils import JSONEncoder
 from .utils import Types
 from .utils import Instances
-from .utils import Aggregators
+from .utils import Aggregators, Aggregator
+from .records import Record
+from .memo import Memo
+from .dates import DateParser
+from .numeric import NumberFormat, NumberFormats
 from .version import __version__
+
+# Loaded on first access, keeps their modules out of import morphit
+Lazy = {
+  'stats': ('.metrics', 'stats'),
+  'ConversionError': ('.collect', 'ConversionError'),
+  'FrozenProcessor': ('.frozen', 'FrozenProcessor'),
+}
+
+def __getattr__(name):
+  if name not in Lazy:
+    raise AttributeError("module 'morphit' has no attribute %r"%name)
+  from importlib import import_module
+  module, attr = Lazy[name]
+  value = globals()[name] = getattr(import_module(module, __name__), attr)
+  return value
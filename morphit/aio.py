@@ -0,0 +1,52 @@
+"""
+asyncio helpers for Processor.amap.
+
+Records are started in input order and at most `concurrency` of them are in
+flight. Results are yielded as soon as the oldest one is done, so a slow
+record holds back the output (never the ordering) and memory stays bounded by
+the window.
+"""
+
+import asyncio
+from collections import deque
+from inspect import isawaitable
+
+async def settle(value):
+  """value with the awaitables in its dicts, lists and tuples awaited"""
+  if isawaitable(value):
+    return await value
+  if isinstance(value, dict):
+    for k, v in value.items():
+      if isawaitable(v) or isinstance(v, (dict, list, tuple)):
+        value[k] = await settle(v)
+  elif isinstance(value, list):
+    for i, v in enumerate(value):
+      if isawaitable(v) or isinstance(v, (dict, list, tuple)):
+        value[i] = await settle(v)
+  elif type(value) is tuple:
+    return tuple([await settle(v) for v in value])
+  return value
+
+async def iterate(records):
+  if hasattr(records, '__aiter__'):
+    async for record in records:
+      yield record
+  else:
+    for record in records:
+      yield record
+
+async def orderedMap(convert, records, concurrency=8):
+  """Yields await convert(record) for every record, in input order"""
+  if concurrency < 1:
+    raise ValueError("concurrency must be at least 1, got %r"%(concurrency,))
+  pending = deque()
+  try:
+    async for record in iterate(records):
+      pending.append(asyncio.ensure_future(convert(record)))
+      if len(pending) >= concurrency:
+        yield await pending.popleft()
+    while pending:
+      yield await pending.popleft()
+  finally:
+    for task in pending:
+      task.cancel()
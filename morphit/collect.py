@@ -0,0 +1,149 @@
+"""
+Non-raising conversion: errors='collect' for Parser.compile and Parser.batch.
+
+Every template field gets a guard around its compiled node. A field that
+fails keeps its input value and adds a ConversionError to the record's error
+list, the other fields keep converting. Records that convert cleanly pay for
+a try block per field and nothing else.
+"""
+
+from collections import namedtuple
+from types import FunctionType
+from .utils import Processor, loadsList, loadsDict
+from .dates import DateParser
+from .numeric import NumberFormat
+from .memo import Memo
+from .compiler import compileNode
+
+# path: keys/indexes from the record root (the record index first in batches)
+ConversionError = namedtuple('ConversionError', ['path', 'input', 'target', 'reason'])
+
+# What a template base converts to, for error reports
+def targetOf(base):
+  if isinstance(base, Memo):
+    return targetOf(base.base)
+  if isinstance(base, (DateParser, NumberFormat)):
+    return base.target
+  if isinstance(base, type) or type(base) is FunctionType or isinstance(base, Processor):
+    return base
+  return type(base)
+
+def reason(e):
+  return '%s: %s'%(type(e).__name__, e)
+
+def leafNode(base, inplace=True):
+  convert = compileNode(base, inplace)
+  target = targetOf(base)
+  def node(var, fallback, errors, path):
+    try:
+      return convert(var, fallback)
+    except Exception as e:
+      errors.append(ConversionError(path, var, target, reason(e)))
+      return var
+  return node
+
+# dict template, each templated key guarded on its own
+def dictNode(base, inplace=True):
+  children = [(k, guardNode(0.0 if v == 'N/A' else v, inplace)) for k, v in base.items()]
+  whole = leafNode(base, inplace)
+
+  if inplace:
+    def fields(var, fallback, errors, path):
+      for k, child in children:
+        if k in var:
+          v = var[k]
+          if v == 'N/A': v = 0.0
+          var[k] = child(v, fallback, errors, path + (k,))
+      return var
+  else:
+    def fields(var, fallback, errors, path):
+      out = None
+      for k, child in children:
+        if k in var:
+          v = var[k]
+          res = child(0.0 if v == 'N/A' else v, fallback, errors, path + (k,))
+          if res is not v:
+            if out is None: out = dict(var)
+            out[k] = res
+      return var if out is None else out
+
+  def node(var, fallback, errors, path):
+    if isinstance(var, dict):
+      return fields(var, fallback, errors, path)
+    if isinstance(var, str):
+      try:
+        loaded = loadsDict(var)
+      except Exception as e:
+        errors.append(ConversionError(path, var, dict, reason(e)))
+        return var
+      if isinstance(loaded, dict):
+        return fields(loaded, fallback, errors, path)
+      return whole(loaded, fallback, errors, path)
+    return whole(var, fallback, errors, path)
+  return node
+
+# list/tuple template, every element guarded on its own
+def seqNode(base, inplace=True):
+  children = [guardNode(b, inplace) for b in base]
+  out = type(base)
+  size = len(children)
+  whole = leafNode(base, inplace)
+
+  def convert(var, fallback, errors, path):
+    if size > 1:
+      m = min(size, len(var))
+      res = [children[i](var[i], fallback, errors, path + (i,)) for i in range(m)]
+      res.extend(var[m:])
+      return res
+    if size == 1:
+      child = children[0]
+      return [child(e, fallback, errors, path + (i,)) for i, e in enumerate(var)]
+    return list(var)
+
+  def node(var, fallback, errors, path):
+    if isinstance(var, (list, tuple)):
+      res = convert(var, fallback, errors, path)
+      if not inplace and type(var) is out and all(a is b for a, b in zip(res, var)):
+        return var
+      return out(res)
+    if isinstance(var, str) and out is list:
+      try:
+        tmp = loadsList(var)
+      except Exception as e:
+        errors.append(ConversionError(path, var, list, reason(e)))
+        return var
+      if size:
+        child = children[0]
+        return [child(e, fallback, errors, path + (i,)) for i, e in enumerate(tmp)]
+      return tmp
+    return whole(var, fallback, errors, path)
+  return node
+
+def guardNode(base, inplace=True):
+  """node(var, fallback, errors, path) that appends failures to errors"""
+  if isinstance(base, dict):
+    return dictNode(base, inplace)
+  if isinstance(base, (list, tuple)):
+    return seqNode(base, inplace)
+  return leafNode(base, inplace)
+
+def collectTemplate(template, inplace=True):
+  """
+  Compile a template into a callable(var, fallback=None) -> (value, errors),
+  errors is a list of ConversionError, empty when every field converted.
+  """
+  node = guardNode(template, inplace)
+
+  def compiled(var, fallback=None):
+    errors = []
+    return node(var, fallback, errors, ()), errors
+
+  compiled.template = template
+  return compiled
+
+def collectBatch(template, records, fallback=None):
+  """Converted rows and the errors of every row, paths start at the row index"""
+  node = guardNode(template)
+  errors = []
+  rows = [node(r, fallback, errors, (i,)) for i, r in enumerate(records)]
+  return rows, errors
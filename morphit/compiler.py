@@ -0,0 +1,448 @@
+"""
+Template compiler.
+
+Walks a template once and builds a tree of nodes, each one a callable
+node(var, fallback). Nodes resolve the Parser overload for the input type
+the first time they see it and jump straight to it afterwards, containers
+(dict, list, tuple) recurse into their compiled children instead of going
+back through dispatch.
+"""
+
+from types import FunctionType
+from inspect import CO_NESTED, iscoroutinefunction
+from datetime import datetime, date
+from .utils import Parser, Processor, Aggregators, Instances, prototype, loadsList, loadsDict
+from .dates import DateParser
+from .records import RecordMeta
+from .memo import Memo
+
+# Overload without the timing wrapper morphit.stats adds while enabled
+def original(impl):
+  return getattr(impl, '__wrapped__', impl)
+
+# Overloads that get a specialized node instead of a plain call
+DICT_DICT = original(Parser.dispatch(dict, dict, object))
+DICT_STR  = original(Parser.dispatch(dict, str, object))
+SEQ_SEQ   = original(Parser.dispatch(list, list, object))
+SEQ_PRIM  = original(Parser.dispatch(list, int, object))
+LIST_STR  = original(Parser.dispatch(list, str, object))
+DT_STR    = original(Parser.dispatch(datetime, str, object))
+DATE_STR  = original(Parser.dispatch(date, str, object))
+
+
+def identity(var, fallback):
+  return var
+
+# Calls through the full dispatcher on every call, used when a base can't be
+# resolved ahead of time (types without a no-arg constructor etc.)
+def dynamicNode(base):
+  def node(var, fallback):
+    return Parser(base, var, fallback)
+  return node
+
+# Builds a node that resolves the overload once per input type
+def switchNode(base, specials):
+  btype = type(base)
+  table = {}
+
+  def resolve(t):
+    fn = table.get(t)
+    if fn is not None:
+      return fn
+    impl = Parser.dispatch(btype, t, object)
+    if impl is None:
+      # Let the dispatcher raise its usual NotImplementedError
+      fn = dynamicNode(base)
+    elif original(impl) in specials:
+      fn = specials[original(impl)]
+    else:
+      def fn(var, fallback):
+        return impl(base, var, fallback)
+    table[t] = fn
+    return fn
+
+  def node(var, fallback):
+    fn = table.get(type(var))
+    if fn is None:
+      fn = resolve(type(var))
+    return fn(var, fallback)
+
+  node.resolve = resolve
+  return node
+
+# Templates with at least PLAN_MIN keys convert through per-shape plans, and
+# keep the plans of up to PLAN_CACHE key tuples. Only compiled templates have
+# plans, Parser(dict, dict) reads the template live and may see it change
+PLAN_MIN = 32
+PLAN_CACHE = 256
+
+# Plan lookup for one template: keys tuple of a record -> the (key, child)
+# pairs it has, in template order. Records of a known shape skip the per key
+# membership checks, sparse records against wide templates most of all.
+# Records wider than the template are cheaper to check key by key.
+def planCache(children):
+  plans = {}
+  width = len(children)
+
+  def plan(var):
+    if len(var) > width:
+      return [(k, child) for k, child in children if k in var]
+    keys = tuple(var)
+    try:
+      return plans[keys]
+    except KeyError:
+      pass
+    present = set(keys)
+    res = [(k, child) for k, child in children if k in present]
+    while len(plans) >= PLAN_CACHE:
+      # Oldest plan first, another thread may have evicted it already
+      try:
+        plans.pop(next(iter(plans)), None)
+      except (RuntimeError, StopIteration):
+        break
+    plans[keys] = res
+    return res
+
+  plan.plans = plans
+  return plan
+
+# dict template: convert every templated key present in the input
+def dictNode(base, inplace=True):
+  children = [(k, compileNode(0.0 if v == 'N/A' else v, inplace)) for k, v in base.items()]
+  specials = {}
+  node = switchNode(base, specials)
+  plan = planCache(children) if len(children) >= PLAN_MIN else None
+
+  if inplace and plan is not None:
+    def fromDict(var, fallback):
+      for k, child in plan(var):
+        v = var[k]
+        if v == 'N/A': v = 0.0
+        var[k] = child(v, fallback)
+      return var
+  elif inplace:
+    def fromDict(var, fallback):
+      for k, child in children:
+        if k in var:
+          v = var[k]
+          if v == 'N/A': v = 0.0
+          var[k] = child(v, fallback)
+      return var
+  elif plan is not None:
+    # Shallow copy on the first converted key, unchanged values are shared
+    def fromDict(var, fallback):
+      out = None
+      for k, child in plan(var):
+        v = var[k]
+        res = child(0.0 if v == 'N/A' else v, fallback)
+        if res is not v:
+          if out is None: out = dict(var)
+          out[k] = res
+      return var if out is None else out
+  else:
+    def fromDict(var, fallback):
+      out = None
+      for k, child in children:
+        if k in var:
+          v = var[k]
+          res = child(0.0 if v == 'N/A' else v, fallback)
+          if res is not v:
+            if out is None: out = dict(var)
+            out[k] = res
+      return var if out is None else out
+
+  def fromStr(var, fallback):
+    return node(loadsDict(var), fallback)
+
+  specials[DICT_DICT] = fromDict
+  specials[DICT_STR] = fromStr
+  node.fields = children
+  node.rows = fromDict
+  node.plan = plan
+  return node
+
+# list/tuple template: cast element-wise, or every element to base[0]
+def seqNode(base, inplace=True):
+  children = [compileNode(b, inplace) for b in base]
+  out = type(base)
+  size = len(children)
+  specials = {}
+  node = switchNode(base, specials)
+
+  if size > 1:
+    def convert(var, fallback):
+      m = min(size, len(var))
+      res = [children[i](var[i], fallback) for i in range(m)]
+      res.extend(var[m:])
+      return res
+  elif size == 1:
+    child = children[0]
+    def convert(var, fallback):
+      return [child(e, fallback) for e in var]
+  else:
+    def convert(var, fallback):
+      return [e for e in var]
+
+  if inplace:
+    def fromSeq(var, fallback):
+      return out(convert(var, fallback))
+  else:
+    # Nothing to mutate here, but an unchanged sequence can be shared
+    def fromSeq(var, fallback):
+      res = convert(var, fallback)
+      if type(var) is out and len(res) == len(var) and all(a is b for a, b in zip(res, var)):
+        return var
+      return out(res)
+
+  def fromPrimitive(var, fallback):
+    return node([var], fallback)
+
+  def fromStr(var, fallback):
+    tmp = loadsList(var)
+    if size:
+      child = children[0]
+      return [child(e, fallback) for e in tmp]
+    return tmp
+
+  specials[SEQ_SEQ] = fromSeq
+  specials[SEQ_PRIM] = fromPrimitive
+  specials[LIST_STR] = fromStr
+  node.items = list(enumerate(children)) if size > 1 else None
+  node.rows = fromSeq
+  return node
+
+# datetime/date template: the field detects its string format on its own
+def dateNode(base):
+  parse = DateParser(datetime if isinstance(base, datetime) else date)
+  def fromStr(var, fallback):
+    return parse(var)
+  return switchNode(base, {DT_STR: fromStr, DATE_STR: fromStr})
+
+def compileNode(base, inplace=True):
+  if base is None:
+    return identity
+  if isinstance(base, RecordMeta):
+    return base._convert
+  if isinstance(base, Memo):
+    return base
+  if isinstance(base, type):
+    # Parser(float, x) == Parser(float(), x), build the instance once
+    try:
+      base = prototype(base)
+    except Exception:
+      return dynamicNode(base)
+  if isinstance(base, Processor):
+    # An in place Processor would mutate the caller's subtree
+    return base if inplace or not base.inplace else base.outOfPlace()
+  if type(base) is FunctionType:
+    if base.__code__.co_argcount == 1:
+      return lambda var, fallback: base(var)
+    return base
+  if isinstance(base, dict):
+    return dictNode(base, inplace)
+  if isinstance(base, (list, tuple)):
+    return seqNode(base, inplace)
+  if isinstance(base, date):
+    return dateNode(base)
+  return switchNode(base, {})
+
+def compileTemplate(template, inplace=True):
+  """
+  Compile a template into a callable(var, fallback=None) that returns the
+  same result as Parser(template, var, fallback). With inplace=False the input
+  is never mutated, converted dicts are shallow copies that share every
+  subtree the template left unchanged.
+  """
+  node = compileNode(template, inplace)
+
+  def compiled(var, fallback=None):
+    return node(var, fallback)
+
+  compiled.template = template
+  return compiled
+
+
+# Converts one column, resolving the converter once when its types are uniform
+def convertColumn(child, values, fallback):
+  types = set(map(type, values))
+  if len(types) != 1 or not hasattr(child, 'resolve'):
+    return [child(v, fallback) for v in values]
+  fn = child.resolve(types.pop())
+  if fn is getattr(child, 'rows', None) and getattr(child, 'fields', None):
+    # Nested dict column, keep going column by column
+    return convertDicts(child.fields, values, fallback)
+  return [fn(v, fallback) for v in values]
+
+# dict rows, converted in place one template key at a time
+def convertDicts(fields, rows, fallback):
+  for k, child in fields:
+    present = [r for r in rows if k in r]
+    values = [0.0 if r[k] == 'N/A' else r[k] for r in present]
+    for r, v in zip(present, convertColumn(child, values, fallback)):
+      r[k] = v
+  return rows
+
+# list/tuple rows, rebuilt from the converted columns plus the untemplated tail
+def convertSeqs(items, rows, out, fallback):
+  size = len(items)
+  cells = [[] for _ in rows]
+  for i, child in items:
+    present = [j for j, r in enumerate(rows) if len(r) > i]
+    converted = convertColumn(child, [rows[j][i] for j in present], fallback)
+    for j, v in zip(present, converted):
+      cells[j].append(v)
+  return [out(c + list(r[size:])) for c, r in zip(cells, rows)]
+
+# Converted rows as columns: dict of lists for dict templates, list of lists
+# for tuple templates, missing cells are None
+def columnsOf(template, rows):
+  if isinstance(template, dict):
+    return dict((k, [r.get(k) if isinstance(r, dict) else None for r in rows]) for k in template)
+  if isinstance(template, (list, tuple)) and len(template) > 1:
+    return [[r[i] if isinstance(r, (list, tuple)) and len(r) > i else None for r in rows]
+            for i in range(len(template))]
+  return [rows]
+
+def batchTemplate(template, records, fallback=None, columns=False, errors='raise'):
+  """
+  Convert many records with one template. Records are transposed into columns
+  so each column resolves its converter once, rows come back in input order.
+  With columns=True the converted columns are returned instead of rows, see
+  columnsOf. errors='collect' converts record by record without raising and
+  returns (rows or columns, [ConversionError]).
+  """
+  if errors == 'collect':
+    from .collect import collectBatch
+    rows, errs = collectBatch(template, records, fallback)
+    return (columnsOf(template, rows) if columns else rows), errs
+  if errors != 'raise':
+    raise ValueError("errors must be 'raise' or 'collect', got %r"%(errors,))
+
+  node = compileNode(template)
+  rows = list(records)
+  fields = getattr(node, 'fields', None)
+  items = getattr(node, 'items', None)
+  kind = dict if fields is not None else (list, tuple)
+
+  # Rows that don't take the columnar overload (json strings, scalars, or
+  # templates that map one type over every element) go through the node alone
+  index = []
+  for i, r in enumerate(rows):
+    if (fields is not None or items) and isinstance(r, kind):
+      index.append(i)
+    else:
+      rows[i] = node(r, fallback)
+  columnar = rows if len(index) == len(rows) else [rows[i] for i in index]
+
+  if fields is not None:
+    convertDicts(fields, columnar, fallback)
+    return columnsOf(template, rows) if columns else rows
+
+  if items:
+    for i, r in zip(index, convertSeqs(items, columnar, type(template), fallback)):
+      rows[i] = r
+  return columnsOf(template, rows) if columns else rows
+
+
+# Processor chains
+
+REDUCE = Aggregators['reduce']
+IDENTITY = Instances['lambda'].__code__
+
+# None or a one argument function compiled to the same bytecode as lambda x: x
+def isIdentity(base):
+  if base is None:
+    return True
+  if type(base) is not FunctionType:
+    return False
+  code = base.__code__
+  return (code.co_argcount == 1 and code.co_kwonlyargcount == 0
+          and code.co_flags | CO_NESTED == IDENTITY.co_flags | CO_NESTED
+          and code.co_code == IDENTITY.co_code)
+
+# Bases that don't depend on the template being read live by Parser
+def isStatic(base):
+  return isinstance(base, (type, Processor)) or type(base) is FunctionType
+
+# frozen: the template is a private copy nothing else can change
+def compileStep(base, inplace=True, frozen=False):
+  """step(var, fallback) for one Processor template"""
+  if inplace and not frozen and not isStatic(base):
+    return dynamicNode(base)
+  return compileNode(base, inplace)
+
+# Templates of a Processor with nested reduce Processors inlined. A reduce
+# chain only hands its last value on, so it can be spliced into another
+# reduce chain, or anywhere when it is a single step
+def chainTemplates(proc):
+  reduce = proc.aggregator is REDUCE
+  out = []
+  for base in proc.templates:
+    if reduce and isIdentity(base):
+      continue
+    if isinstance(base, Processor) and base.inplace == proc.inplace and base.aggregator is REDUCE:
+      inner = chainTemplates(base)
+      if reduce or len(inner) == 1:
+        out.extend(inner)
+        continue
+    out.append(base)
+  return out
+
+# Whether a template calls coroutine functions, in dict/list/tuple templates
+# and nested Processors too. Every nested Processor is appended to nested
+def awaitsTemplate(base, nested=None):
+  if iscoroutinefunction(base):
+    return True
+  if isinstance(base, Processor):
+    if nested is not None:
+      nested.append(base)
+    return awaitsIn(base, nested)
+  if isinstance(base, dict):
+    values = base.values()
+  elif isinstance(base, (list, tuple)):
+    values = base
+  else:
+    return False
+  found = False
+  for v in values:
+    found = awaitsTemplate(v, nested) or found
+  return found
+
+# Whether a Processor has coroutine function steps, nested ones included
+def awaitsIn(proc, nested=None):
+  found = False
+  for base in proc.templates:
+    found = awaitsTemplate(base, nested) or found
+  return found
+
+# Runs nodes one after the other as a single step
+def fuseNodes(nodes):
+  if len(nodes) == 1:
+    return nodes[0]
+  def fused(var, fallback):
+    for node in nodes:
+      var = node(var, fallback)
+    return var
+  return fused
+
+def optimizeChain(proc):
+  """
+  Flat list of step(var, fallback) for a Processor: nested reduce Processors
+  are inlined, and in reduce chains identity steps are dropped and runs of
+  type conversions (float, int, ...) become one step.
+  """
+  templates = chainTemplates(proc)
+  if proc.aggregator is not REDUCE:
+    return [compileStep(base, proc.inplace, proc.frozen) for base in templates]
+  steps, run = [], []
+  for base in templates:
+    if isinstance(base, type):
+      run.append(compileNode(base, proc.inplace))
+      continue
+    if run:
+      steps.append(fuseNodes(run))
+      run = []
+    steps.append(compileStep(base, proc.inplace, proc.frozen))
+  if run:
+    steps.append(fuseNodes(run))
+  return steps
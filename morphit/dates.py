@@ -0,0 +1,125 @@
+"""
+Date string parsing.
+
+A DateParser remembers the format of the last string it parsed (float or int
+timestamp, plain ISO 8601, anything else) and checks the next string against
+that format first. Plain ISO strings go through datetime.fromisoformat and
+everything the fast path doesn't cover falls back to iso8601.parse_date, naive
+results are UTC like iso8601's. iso8601 is only imported once a string needs
+it.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from datetime import datetime, date, timezone
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'hitrate'])
+
+# Shapes that datetime.fromisoformat parses the same way iso8601 does
+ISO_SHAPE = re.compile(
+  r'[0-9]{4}-[0-9]{2}-[0-9]{2}'
+  r'(?:[T ][0-9]{2}:[0-9]{2}(?::[0-9]{2}(?:\.[0-9]{1,6})?)?)?'
+  r'(?:Z|[+-][0-9]{2}:[0-9]{2})?'
+).fullmatch
+DAY_SHAPE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}').fullmatch
+
+def isFloatString(var):
+  head, _, tail = var.partition('.')
+  return head.isdigit() and tail.isdigit()
+
+# float timestamp in seconds
+def fromFloatString(var):
+  return datetime.fromtimestamp(float(var))
+
+# int timestamp, in ms when it's too big to be seconds
+def fromIntString(var):
+  var = int(var)
+  if(var > 150000000000): # Check if ms timestamp
+    return datetime.fromtimestamp(var / 1e3)
+  return datetime.fromtimestamp(var)
+
+# Anything the fast paths don't handle
+def parseIso8601(var):
+  import iso8601
+  return iso8601.parse_date(var)
+
+def fromIsoString(var):
+  try:
+    res = datetime.fromisoformat(var)
+  except ValueError:
+    # Older pythons don't take 'Z' or odd fraction lengths
+    return parseIso8601(var)
+  if res.tzinfo is None:
+    return res.replace(tzinfo=timezone.utc)
+  return res
+
+# (check, parse) per format, in detection order
+Formats = {
+  'float': (isFloatString, fromFloatString),
+  'int':   (str.isdigit, fromIntString),
+  'iso':   (ISO_SHAPE, fromIsoString),
+}
+
+def detect(var):
+  for kind, (check, parse) in Formats.items():
+    if check(var):
+      return kind
+  return None
+
+class DateParser():
+  """
+  Callable str -> datetime (or date with target=date) that detects the string
+  format once and keeps using it while the strings match. cache=N keeps an
+  LRU of the last N distinct strings, see cacheInfo() for its hit rate.
+  """
+  def __init__(self, target=datetime, cache=0):
+    self.target = target
+    # (kind, check, parse) of the last format seen, one tuple so threads
+    # never see the check of one format with the parse of another
+    self.format = None
+    self.maxsize = cache
+    self.convert = lru_cache(maxsize=cache)(self.parseString) if cache else self.parseString
+
+  def __call__(self, var):
+    return self.convert(var)
+
+  def parseString(self, var):
+    fmt = self.format
+    if fmt is None or not fmt[1](var):
+      kind = detect(var)
+      if kind is None:
+        res = parseIso8601(var)
+        return res.date() if self.target is date else res
+      fmt = self.format = (kind,) + Formats[kind]
+    kind, check, parse = fmt
+    if self.target is date:
+      if kind == 'iso' and DAY_SHAPE(var):
+        return date.fromisoformat(var)
+      return parse(var).date()
+    return parse(var)
+
+  @property
+  def kind(self):
+    return self.format[0] if self.format else None
+
+  def cacheInfo(self):
+    if not self.maxsize:
+      return CacheInfo(0, 0, 0, 0, 0.0)
+    info = self.convert.cache_info()
+    total = info.hits + info.misses
+    return CacheInfo(info.hits, info.misses, info.maxsize, info.currsize,
+                     info.hits / total if total else 0.0)
+
+  def cacheClear(self):
+    if self.maxsize:
+      self.convert.cache_clear()
+
+  def __getstate__(self):
+    return {'target': self.target, 'cache': self.maxsize}
+
+  def __setstate__(self, state):
+    self.__init__(state['target'], state['cache'])
+
+  def __repr__(self):
+    return 'DateParser(%s, cache=%d)'%(self.target.__name__, self.maxsize)
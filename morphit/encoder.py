@@ -0,0 +1,86 @@
+"""
+JSON encoders compiled from morphit templates.
+
+The template says which fields hold datetimes (or any other type with a
+JSONEncoder handler), those are converted before json encoding so the C
+encoder never has to call back into JSONEncoder.default for them. Other
+fields are left to the encoder as usual. The input is never mutated.
+"""
+
+from .utils import JSONEncoder
+from .dates import DateParser
+from .numeric import NumberFormat
+from .memo import Memo
+
+# Output type of a template base, when the encoder has a handler for it
+def targetType(base):
+  if isinstance(base, Memo):
+    base = base.base
+  if isinstance(base, (DateParser, NumberFormat)):
+    base = base.target
+  if not isinstance(base, type):
+    base = type(base)
+  return base if base in JSONEncoder.handlers else None
+
+# Builds prepare(value) for a template base, None when there's nothing to do
+def prepareNode(base):
+  t = targetType(base)
+  if t is not None:
+    handler = JSONEncoder.handlers[t]
+    def prepare(v):
+      return handler(v) if type(v) is t else v
+    return prepare
+
+  if isinstance(base, type) and base in (dict, list, tuple):
+    return None
+
+  if isinstance(base, dict):
+    fields = [(k, prepareNode(b)) for k, b in base.items()]
+    fields = [(k, p) for k, p in fields if p is not None]
+    if not fields:
+      return None
+    def prepare(v):
+      if type(v) is not dict:
+        return v
+      out = v.copy()
+      for k, p in fields:
+        x = v.get(k, out)
+        if x is not out:
+          out[k] = p(x)
+      return out
+    return prepare
+
+  if isinstance(base, (list, tuple)) and base:
+    items = [prepareNode(b) for b in base]
+    if not any(items):
+      return None
+    if len(items) == 1:
+      p = items[0]
+      def prepare(v):
+        if type(v) not in (list, tuple):
+          return v
+        return [p(e) for e in v]
+      return prepare
+    items = [p or (lambda e: e) for p in items]
+    def prepare(v):
+      if type(v) not in (list, tuple):
+        return v
+      res = [p(e) for p, e in zip(items, v)]
+      res.extend(v[len(items):])
+      return res
+    return prepare
+  return None
+
+def compileEncoder(template, **kwargs):
+  """
+  Returns encode(obj) -> str for objects shaped like template. kwargs go to
+  JSONEncoder (indent, sort_keys, ...).
+  """
+  encoder = JSONEncoder(**kwargs)
+  prepare = prepareNode(template)
+  if prepare is None:
+    return encoder.encode
+  def encode(obj):
+    return encoder.encode(prepare(obj))
+  encode.template = template
+  return encode
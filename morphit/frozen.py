@@ -0,0 +1,81 @@
+"""
+Immutable Processors that are safe to share between threads.
+
+Processor.freeze() copies the templates, so the caller can't change them
+under a running conversion, freezes nested Processors, and compiles every
+step up front. The FrozenProcessor itself is never written after it's built,
+then() returns a new one. Like Parser.compile, overloads registered
+afterwards aren't picked up.
+
+The compiled steps still fill caches on first use: the overload resolved per
+input type of each node, and the shape plans of wide dict templates. Which
+types and shapes a conversion meets isn't known up front, so these can't be
+warmed at build time. Every fill stores a value that any thread would compute
+the same way, and the plan cache tolerates concurrent eviction. Threads that
+race can compute the same entry twice, but never see a partial one. That
+relies on single dict operations being atomic. They are under the GIL, and
+free-threaded builds lock each dict.
+
+Input records are still converted in place unless inplace=False, a record
+must not be shared between threads converting it.
+"""
+
+from .utils import Processor
+
+# Private copy of a template, containers are rebuilt and nested Processors
+# frozen. Other bases are shared: DateParser and Memo are safe to share,
+# Memo keeps one cache (and cacheInfo) for every thread
+def freezeTemplate(base):
+  if isinstance(base, Processor):
+    return base.freeze()
+  # Subclasses (inferred Templates, OrderedDict) keep their type
+  if isinstance(base, dict):
+    return type(base)((k, freezeTemplate(v)) for k, v in base.items())
+  if hasattr(base, '_fields') and isinstance(base, tuple):
+    return type(base)(*[freezeTemplate(v) for v in base])
+  if isinstance(base, (list, tuple)):
+    return type(base)(freezeTemplate(v) for v in base)
+  return base
+
+class FrozenProcessor(Processor):
+  frozen = True
+
+  def __init__(self, templates, aggregator='reduce', inplace=True):
+    from .compiler import compileStep, optimizeChain, awaitsIn
+    init = object.__setattr__
+    proc = Processor(None, aggregator, inplace)
+    init(self, 'aggregator', proc.aggregator)
+    init(self, 'inplace', inplace)
+    init(self, 'templates', tuple(freezeTemplate(t) for t in templates))
+    steps = [compileStep(base, inplace, True) for base in self.templates]
+    if Processor.instrument is not None:
+      steps = [Processor.instrument(self, i, step) for i, step in enumerate(steps)]
+    init(self, 'compiled', (None, steps))
+    # Stats are kept per template, see Processor.optimize
+    init(self, 'plan', (None, steps if Processor.instrument is not None else optimizeChain(self)))
+    init(self, 'awaits', awaitsIn(self))
+
+  def __setattr__(self, name, value):
+    raise AttributeError("FrozenProcessor can't be changed, %r is read only"%name)
+
+  def steps(self):
+    return self.compiled[1]
+
+  def optimize(self):
+    return self.plan[1]
+
+  def then(self, base):
+    """New FrozenProcessor with base appended, this one is unchanged"""
+    return FrozenProcessor(self.templates + (base,), self.aggregator, self.inplace)
+
+  def freeze(self):
+    return self
+
+  def outOfPlace(self):
+    return self if not self.inplace else FrozenProcessor(self.templates, self.aggregator, False)
+
+  def __reduce__(self):
+    return (FrozenProcessor, (self.templates, self.aggregator, self.inplace))
+
+  def __repr__(self):
+    return 'FrozenProcessor(%r)'%(list(self.templates),)
@@ -0,0 +1,156 @@
+"""
+Template inference from sample records.
+
+Every value is classified with the rules Parser applies when converting (see
+the overloads in utils): clean numeric strings, the strings Parser reads as
+booleans, epoch timestamps in seconds or ms, ISO 8601 strings and JSON or
+python literals inside strings. The templates of all samples are then merged
+field by field, fields whose samples can't agree are left alone (None).
+"""
+
+import re
+from itertools import islice
+from datetime import datetime, date
+from .dates import ISO_SHAPE, DAY_SHAPE
+from .literals import loads
+
+# Strings Parser(bool, var) reads correctly, 'true'/'false' would all be False
+TRUE = frozenset(['True', 't', '1', '1.0'])
+FALSE = frozenset(['False', 'f', '0', '0.0'])
+# Placeholders that say nothing about the type of a field
+EMPTY = frozenset(['', 'N/A', 'null', 'None', 'NaN'])
+
+INT = re.compile(r'-?[0-9]+').fullmatch
+FLOAT = re.compile(r'-?[0-9]+\.[0-9]*|-?\.[0-9]+').fullmatch
+WORDS = re.compile(r'[a-z]+|[A-Z][a-z]*').findall
+
+# Field name words that make a number in epoch range a timestamp, ids and
+# counts can be that big too
+TIME_WORDS = frozenset(['at', 'ts', 'time', 'timestamp', 'date', 'datetime',
+                        'epoch', 'created', 'updated', 'modified', 'expires'])
+SECONDS = (946684800, 4102444800) # 2000 - 2100
+
+# Marks a field with no usable value yet, and '0'/'1' strings that are ints
+# unless another sample says bool
+MISSING = object()
+BIT = object()
+
+def isTimeKey(key):
+  return isinstance(key, str) and any(w.lower() in TIME_WORDS for w in WORDS(key))
+
+# Same ms rule as Parser(datetime, int)
+def isEpoch(number):
+  if number > 150000000000:
+    number = number / 1e3
+  return SECONDS[0] <= number <= SECONDS[1]
+
+def inferString(var, key):
+  if var in EMPTY:
+    return MISSING
+  if var in TRUE or var in FALSE:
+    if var in ('1', '0'):
+      return BIT
+    if var in ('1.0', '0.0'):
+      return float
+    return bool
+  number = INT(var) or FLOAT(var)
+  if number:
+    if isTimeKey(key) and isEpoch(float(var)):
+      return datetime
+    return int if INT(var) else float
+  if DAY_SHAPE(var):
+    return date
+  if ISO_SHAPE(var):
+    return datetime
+  # Only what loadsList/loadsDict read as containers, '(1, 2)' stays a str
+  if (var[:1], var[-1:]) in (('[', ']'), ('{', '}')):
+    try:
+      loaded = loads(var)
+    except ValueError:
+      return str
+    return inferValue(loaded, key)
+  return str
+
+def inferValue(var, key=None):
+  if var is None:
+    return MISSING
+  if isinstance(var, bool):
+    return bool
+  if isinstance(var, (int, float)):
+    if isTimeKey(key) and isEpoch(var):
+      return datetime
+    return type(var)
+  if isinstance(var, str):
+    return inferString(var, key)
+  if isinstance(var, dict):
+    return dict((k, inferValue(v, k)) for k, v in var.items())
+  if isinstance(var, (list, tuple)):
+    item = MISSING
+    for v in var:
+      item = merge(item, inferValue(v, key))
+    return [item]
+  if isinstance(var, (datetime, date)):
+    return type(var)
+  return MISSING
+
+# Template both a and b convert correctly, None if there is none
+def merge(a, b):
+  if a is MISSING:
+    return b
+  if b is MISSING or a is b:
+    return a
+  if isinstance(a, dict) and isinstance(b, dict):
+    res = dict(a)
+    for k, v in b.items():
+      res[k] = merge(res.get(k, MISSING), v)
+    return res
+  if isinstance(a, list) and isinstance(b, list):
+    return [merge(a[0], b[0])]
+  if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+    return None
+  pair = set([a, b])
+  if pair == set([BIT, bool]):
+    return bool
+  if pair <= set([BIT, int, float]):
+    return float if float in pair else int
+  if pair == set([date, datetime]):
+    return datetime
+  return None
+
+# MISSING/BIT -> what the template should say
+def finish(node):
+  if node is MISSING:
+    return None
+  if node is BIT:
+    return int
+  if isinstance(node, dict):
+    return dict((k, finish(v)) for k, v in node.items())
+  if isinstance(node, list):
+    return list if node[0] is MISSING else [finish(node[0])]
+  return node
+
+def formatTemplate(node, indent=0):
+  pad = '    ' * (indent + 1)
+  if isinstance(node, dict):
+    if not node:
+      return '{}'
+    fields = ''.join('%s%r: %s,\n'%(pad, k, formatTemplate(v, indent + 1)) for k, v in node.items())
+    return '{\n%s%s}'%(fields, '    ' * indent)
+  if isinstance(node, list):
+    return '[%s]'%', '.join(formatTemplate(v, indent) for v in node)
+  if isinstance(node, type):
+    return node.__name__
+  return repr(node)
+
+class Template(dict):
+  """Inferred template, a plain dict template that prints as python source"""
+  def __repr__(self):
+    return formatTemplate(self)
+
+def inferTemplate(samples, max_samples=1000):
+  """Merged template of the first max_samples records"""
+  node = MISSING
+  for record in islice(samples, max_samples):
+    node = merge(node, inferValue(record))
+  node = finish(node)
+  return Template(node) if isinstance(node, dict) else node
@@ -0,0 +1,159 @@
+"""
+Lazy output: Parser.compile(template, lazy=True).
+
+A dict template returns a LazyRecord, a read-only Mapping over the raw
+record. Each templated field is converted the first time it's read and
+cached, untemplated keys read through to the record. Nested dict templates
+give nested LazyRecords and list templates LazyLists, so reading
+r['a']['b'] converts nothing else. materialize() converts whatever is left
+and returns plain dicts and lists, equal to what Parser.compile(template,
+inplace=False) returns. The raw record is never changed, conversion errors
+are raised by the read that hits them.
+"""
+
+from collections.abc import Mapping, Sequence
+from .utils import JSONEncoder, loadsDict, loadsList
+from .compiler import compileNode
+
+# Not yet converted, cached values can be anything
+MISSING = object()
+
+def materialize(value):
+  return value.materialize() if type(value) in LAZY else value
+
+class LazyRecord(Mapping):
+  __slots__ = ('raw', 'children', 'fallback', 'cache')
+
+  def __init__(self, raw, children, fallback=None):
+    self.raw = raw
+    self.children = children
+    self.fallback = fallback
+    self.cache = {}
+
+  def __getitem__(self, k):
+    res = self.cache.get(k, MISSING)
+    if res is not MISSING:
+      return res
+    v = self.raw[k]
+    child = self.children.get(k)
+    if child is None:
+      return v
+    res = self.cache[k] = child(0.0 if v == 'N/A' else v, self.fallback)
+    return res
+
+  def __contains__(self, k):
+    return k in self.raw
+
+  def __iter__(self):
+    return iter(self.raw)
+
+  def __len__(self):
+    return len(self.raw)
+
+  def materialize(self):
+    """Plain dict with every field converted, nested proxies included"""
+    cache, children, fallback = self.cache, self.children, self.fallback
+    out = {}
+    for k, v in self.raw.items():
+      res = cache.get(k, MISSING)
+      if res is MISSING:
+        child = children.get(k)
+        res = v if child is None else child(0.0 if v == 'N/A' else v, fallback)
+      out[k] = res.materialize() if type(res) in LAZY else res
+    return out
+
+  def __repr__(self):
+    return '<LazyRecord %d keys, %d converted>'%(len(self.raw), len(self.cache))
+
+class LazyList(Sequence):
+  """List template over a raw list, items[i] converts element i on first read"""
+  __slots__ = ('raw', 'children', 'fallback', 'cache')
+
+  def __init__(self, raw, children, fallback=None):
+    self.raw = raw
+    self.children = children
+    self.fallback = fallback
+    self.cache = {}
+
+  def item(self, i):
+    res = self.cache.get(i, MISSING)
+    if res is not MISSING:
+      return res
+    v = self.raw[i]
+    children = self.children
+    if len(children) == 1:
+      child = children[0]
+    elif i < len(children):
+      child = children[i]
+    else:
+      return v
+    res = self.cache[i] = child(v, self.fallback)
+    return res
+
+  def __getitem__(self, i):
+    if isinstance(i, slice):
+      return [self.item(j) for j in range(*i.indices(len(self.raw)))]
+    if i < 0:
+      i += len(self.raw)
+      if i < 0:
+        raise IndexError('list index out of range')
+    return self.item(i)
+
+  def __len__(self):
+    return len(self.raw)
+
+  def __eq__(self, other):
+    if isinstance(other, (list, LazyList)):
+      return list(self) == list(other)
+    return NotImplemented
+
+  def materialize(self):
+    return [materialize(self.item(i)) for i in range(len(self.raw))]
+
+  def __repr__(self):
+    return '<LazyList %d items, %d converted>'%(len(self.raw), len(self.cache))
+
+# Exact types, isinstance against Mapping subclasses goes through ABCMeta
+LAZY = frozenset([LazyRecord, LazyList])
+
+# node(var, fallback) for a template, proxies for dict and list templates
+def lazyNode(base):
+  if isinstance(base, dict):
+    children = dict((k, lazyNode(0.0 if v == 'N/A' else v)) for k, v in base.items())
+    eager = compileNode(base, False)
+    def node(var, fallback):
+      if isinstance(var, str):
+        var = loadsDict(var)
+      if isinstance(var, dict):
+        return LazyRecord(var, children, fallback)
+      return eager(var, fallback)
+    return node
+  if isinstance(base, list) and base:
+    children = [lazyNode(b) for b in base]
+    eager = compileNode(base, False)
+    def node(var, fallback):
+      # Parser maps base[0] over a list string whatever the template's length
+      if isinstance(var, str) and len(children) == 1:
+        var = loadsList(var)
+      if isinstance(var, (list, tuple)):
+        return LazyList(var, children, fallback)
+      return eager(var, fallback)
+    return node
+  # Tuples and scalars convert on first read like any field
+  return compileNode(base, False)
+
+def lazyTemplate(template):
+  """
+  Compile a template into a callable(var, fallback=None) returning a
+  LazyRecord (or LazyList) over var, see the module docstring.
+  """
+  node = lazyNode(template)
+
+  def compiled(var, fallback=None):
+    return node(var, fallback)
+
+  compiled.template = template
+  return compiled
+
+JSONEncoder.register(LazyRecord, LazyRecord.materialize)
+JSONEncoder.register(LazyList, LazyList.materialize)
@@ -0,0 +1,173 @@
+"""
+Tolerant loader for list/dict strings: JSON, python literals ("['a', 1]",
+"{'a': True}") and python 2 unicode reprs ("[u'a', u'b']").
+
+Valid JSON goes straight to json.loads. Python reprs without double quotes or
+escapes have every ' as a string delimiter, so they are rewritten to JSON
+with str.split/join only. Anything else (escapes, apostrophes inside double
+quoted strings, True/None, tuples, trailing commas) is read by a single pass
+tokenizer that builds the values directly.
+"""
+
+import re, json
+from json.decoder import scanstring
+
+TOKEN_PATTERN = r"""
+  [ \t\n\r]*
+  (?:
+    (?P<punct>[\[\]{}(),:])
+  | (?P<dquote>u?")
+  | u?'(?P<squote>(?:[^'\\]+|\\.)*)'
+  | (?P<number>-?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)
+  | (?P<const>true|false|null|True|False|None|NaN|-?Infinity)
+  )"""
+
+# Compiled on first use, only the fallback tokenizer needs them
+Patterns = {
+  'token':    (TOKEN_PATTERN, re.S | re.X),
+  'trailing': (r'[ \t\n\r]*', 0),
+  'escape':   (r"\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)", re.S),
+}
+Compiled = {}
+
+def pattern(name):
+  try:
+    return Compiled[name]
+  except KeyError:
+    source, flags = Patterns[name]
+    res = Compiled[name] = re.compile(source, flags)
+    return res
+
+Constants = {
+  'true': True, 'false': False, 'null': None,
+  'True': True, 'False': False, 'None': None,
+  'NaN': float('nan'), 'Infinity': float('inf'), '-Infinity': float('-inf'),
+}
+
+Escapes = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '0': '\0'}
+
+def unescapeChar(m):
+  c = m.group(1)
+  if len(c) > 1:
+    return chr(int(c[1:], 16))
+  return Escapes.get(c, c)
+
+def unescape(var):
+  return pattern('escape').sub(unescapeChar, var) if '\\' in var else var
+
+def number(var):
+  if var.lstrip('-').isdigit():
+    return int(var)
+  return float(var)
+
+# What an open container takes next: ITEM a value (a key in dicts) or the
+# closer, SEP ',' or the closer, COLON the ':' after a key, VALUE a dict value
+ITEM, SEP, COLON, VALUE = range(4)
+
+def scan(text):
+  """Single pass tokenizer, builds lists/dicts as it goes"""
+  match = pattern('token').match
+  stack = []   # open containers
+  keys = []    # pending dict key per open container
+  closing = [] # expected closing bracket per open container
+  expect = []  # ITEM/SEP/COLON/VALUE per open container
+  result = []
+  pos = 0
+  end = len(text)
+  openers = {'[': (list, ']'), '(': (list, ')'), '{': (dict, '}')}
+
+  def unexpected(m):
+    return ValueError("Unexpected %r at %d"%(m.group(0).strip(), m.start()))
+
+  while True:
+    m = match(text, pos)
+    if m is None:
+      break
+    pos = m.end()
+    kind = m.lastgroup
+    if kind == 'punct':
+      p = m.group('punct')
+      if p in openers:
+        if expect and expect[-1] not in (ITEM, VALUE):
+          raise unexpected(m)
+        container, closer = openers[p]
+        stack.append(container())
+        keys.append(None)
+        closing.append(closer)
+        expect.append(ITEM)
+        continue
+      if p == ',':
+        if not expect or expect[-1] != SEP:
+          raise unexpected(m)
+        expect[-1] = ITEM
+        continue
+      if p == ':':
+        if not expect or expect[-1] != COLON:
+          raise unexpected(m)
+        expect[-1] = VALUE
+        continue
+      if not closing or closing[-1] != p or expect[-1] not in (ITEM, SEP):
+        raise unexpected(m)
+      closing.pop()
+      keys.pop()
+      expect.pop()
+      value = stack.pop()
+    elif kind == 'dquote':
+      value, pos = scanstring(text, pos, False)
+    elif kind == 'squote':
+      value = unescape(m.group('squote'))
+    elif kind == 'number':
+      value = number(m.group('number'))
+    else:
+      value = Constants[m.group('const')]
+
+    if not stack:
+      result.append(value)
+      continue
+    top = stack[-1]
+    state = expect[-1]
+    if type(top) is list and state == ITEM:
+      top.append(value)
+      expect[-1] = SEP
+    elif type(top) is dict and state == ITEM:
+      try:
+        hash(value)
+      except TypeError:
+        raise ValueError("Unhashable dict key %r at %d"%(value, m.start()))
+      keys[-1] = value
+      expect[-1] = COLON
+    elif state == VALUE:
+      top[keys[-1]] = value
+      keys[-1] = None
+      expect[-1] = SEP
+    else:
+      raise ValueError("Missing separator before %r at %d"%(value, m.start()))
+
+  pos = pattern('trailing').match(text, pos).end()
+  if stack or pos != end or len(result) != 1:
+    raise ValueError("Malformed literal at %d: %r"%(pos, text[pos:pos + 20]))
+  return result[0]
+
+def requote(text):
+  """
+  Python repr -> JSON when every ' is a string delimiter. Split on ' puts the
+  text outside strings at even indexes, a u there can only be a u'' prefix.
+  """
+  if "u'" not in text or '\0' in text:
+    return text.replace("'", '"')
+  parts = text.split("'")
+  parts[0::2] = '\0'.join(parts[0::2]).replace('u', '').split('\0')
+  return '"'.join(parts)
+
+def loads(text):
+  """str -> list/dict/value from JSON or python literal text"""
+  try:
+    return json.loads(text)
+  except ValueError:
+    pass
+  if '"' not in text and '\\' not in text:
+    try:
+      return json.loads(requote(text))
+    except ValueError:
+      pass
+  return scan(text)
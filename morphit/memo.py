@@ -0,0 +1,104 @@
+"""
+Bounded memoization of scalar conversions.
+
+Memo(base, size) is a template base that converts like base and remembers
+the last size distinct inputs. Only immutable scalars are cached, both ways:
+other inputs (None, dicts, lists) are converted every time, and a result that
+isn't an immutable scalar is returned without being cached so callers never
+share a mutable value. Keys are typed, 1, 1.0 and True are cached apart.
+Bases that take a fallback (two argument functions, Processors) are only
+cached for calls without one, other calls convert with the real fallback.
+"""
+
+import sys
+from functools import lru_cache
+from datetime import datetime, date, time, timedelta
+from .dates import CacheInfo
+
+# Inputs and outputs that are safe to share between calls. Decimal is added
+# by scalars() once something has imported decimal, there are none before
+SCALARS = set([str, bytes, int, float, bool, complex, datetime, date, time, timedelta])
+
+def scalars():
+  if 'decimal' in sys.modules:
+    SCALARS.add(sys.modules['decimal'].Decimal)
+  return SCALARS
+
+# Bases whose result can depend on the fallback, not only on var
+def usesFallback(base):
+  if isinstance(base, dict):
+    return any(usesFallback(v) for v in base.values())
+  if isinstance(base, (list, tuple)):
+    return any(usesFallback(v) for v in base)
+  if isinstance(base, Memo):
+    return usesFallback(base.base)
+  template = getattr(base, '_template', None)
+  if isinstance(template, dict):
+    return usesFallback(template)
+  code = getattr(base, '__code__', None)
+  return code is not None and code.co_argcount >= 2
+
+class Uncached(Exception):
+  """Carries a result lru_cache must not keep, it doesn't cache exceptions"""
+  def __init__(self, value):
+    self.value = value
+
+class Memo():
+  """
+  {'active': Memo(bool), 'price': Memo(NumberFormats['us'], size=256)}
+  Processor(Memo(lookup)) memoizes a step. cacheInfo() has the hit rate,
+  results that weren't cached count as misses.
+  """
+  def __init__(self, base, size=1024):
+    if size < 1:
+      raise ValueError("Memo size must be at least 1, got %r"%(size,))
+    self.base = base
+    self.size = size
+    self.convert = None
+    self.cached = None
+    self.fallbacks = False
+
+  def compile(self):
+    from .compiler import compileNode
+    self.convert = compileNode(self.base, False)
+    self.fallbacks = usesFallback(self.base)
+    safe = scalars()
+
+    def compute(var):
+      res = self.convert(var, None)
+      if type(res) not in safe:
+        raise Uncached(res)
+      return res
+
+    self.cached = lru_cache(maxsize=self.size, typed=True)(compute)
+
+  def __call__(self, var, fallback=None):
+    if self.cached is None:
+      self.compile()
+    if type(var) not in SCALARS or (fallback is not None and self.fallbacks):
+      return self.convert(var, fallback)
+    try:
+      return self.cached(var)
+    except Uncached as e:
+      return e.value
+
+  def cacheInfo(self):
+    if self.cached is None:
+      return CacheInfo(0, 0, self.size, 0, 0.0)
+    info = self.cached.cache_info()
+    total = info.hits + info.misses
+    return CacheInfo(info.hits, info.misses, info.maxsize, info.currsize,
+                     info.hits / total if total else 0.0)
+
+  def cacheClear(self):
+    """Drops cached results and recompiles base on the next call"""
+    self.convert = self.cached = None
+
+  def __getstate__(self):
+    return {'base': self.base, 'size': self.size}
+
+  def __setstate__(self, state):
+    self.__init__(state['base'], state['size'])
+
+  def __repr__(self):
+    return 'Memo(%r, size=%d)'%(self.base, self.size)
@@ -0,0 +1,194 @@
+"""
+Opt-in runtime statistics for conversions.
+
+While enabled, every Parser overload is wrapped with a timer that records
+calls, errors and latency per (base type, input type) of the actual call, and
+every Processor step is timed on its own. Disabled (the default) nothing is
+wrapped, so there is no cost at all.
+
+Times are inclusive: a dict conversion includes the conversions of its
+fields. Templates compiled with Parser.compile before enable() keep their
+resolved overloads and aren't timed. Latencies go into log scale buckets (4
+per power of two), percentiles are the upper bound of their bucket. Recording
+isn't locked, counts from concurrent threads may come out slightly low.
+"""
+
+from time import perf_counter_ns
+from functools import wraps
+from types import FunctionType
+from inspect import iscoroutinefunction
+from .utils import Parser, ParserDispatcher, Processor, clearCaches
+
+# ns -> histogram bucket, top 3 bits of the value
+def bucket(ns):
+  bits = ns.bit_length()
+  if bits <= 3:
+    return bits << 2
+  return bits << 2 | ((ns >> (bits - 3)) & 3)
+
+# Largest ns that falls in a bucket
+def bucketTop(key):
+  bits, sub = key >> 2, key & 3
+  if bits <= 3:
+    return (1 << bits) - 1
+  return ((5 + sub) << (bits - 3)) - 1
+
+class Timing():
+  __slots__ = ('count', 'errors', 'total', 'max', 'buckets')
+
+  def __init__(self):
+    self.count = 0
+    self.errors = 0
+    self.total = 0
+    self.max = 0
+    self.buckets = {}
+
+  def add(self, ns, failed=False):
+    self.count += 1
+    self.total += ns
+    if ns > self.max:
+      self.max = ns
+    if failed:
+      self.errors += 1
+    key = bucket(ns)
+    self.buckets[key] = self.buckets.get(key, 0) + 1
+
+  def percentile(self, q):
+    if not self.count:
+      return 0.0
+    rank = q * self.count
+    seen = 0
+    for key in sorted(self.buckets):
+      seen += self.buckets[key]
+      if seen >= rank:
+        return min(bucketTop(key), self.max) / 1e9
+    return self.max / 1e9
+
+  def summary(self):
+    """Counts and times in seconds"""
+    return {
+      'count': self.count,
+      'errors': self.errors,
+      'total': self.total / 1e9,
+      'mean': self.total / 1e9 / self.count if self.count else 0.0,
+      'p50': self.percentile(0.5),
+      'p90': self.percentile(0.9),
+      'p99': self.percentile(0.99),
+      'max': self.max / 1e9,
+    }
+
+# Readable name of a Processor template
+def describe(base):
+  if base is None:
+    return 'None'
+  if isinstance(base, type):
+    return base.__name__
+  if type(base) is FunctionType:
+    return base.__qualname__
+  if isinstance(base, Processor):
+    return 'Processor'
+  return '%s template'%type(base).__name__
+
+# Overloads that only forward to another overload, timing them would count
+# the same call twice: the 2 argument wrapper and Parser(float, var)
+def isForwarding(signature):
+  return len(signature) == 2 or signature[0] is type
+
+class Stats():
+  """
+  morphit.stats() returns a snapshot:
+    {'dispatch': {('float', 'str'): {'count', 'errors', 'total', 'mean',
+                                     'p50', 'p90', 'p99', 'max'}, ...},
+     'steps': {'float | <lambda> [1]': {...}, ...}}
+  Step keys are the Processor's templates followed by the step index.
+  """
+  def __init__(self):
+    self.enabled = False
+    self.dispatch = {}
+    self.steps = {}
+
+  def __call__(self):
+    return self.snapshot()
+
+  def enable(self):
+    if self.enabled:
+      return
+    self.enabled = True
+    ParserDispatcher.instrument = self.timeDispatch
+    Processor.instrument = self.timeStep
+    for signature, func in list(Parser.funcs.items()):
+      Parser.funcs[signature] = self.timeDispatch(signature, func)
+    self.refresh()
+
+  def disable(self):
+    if not self.enabled:
+      return
+    self.enabled = False
+    ParserDispatcher.instrument = None
+    Processor.instrument = None
+    for signature, func in list(Parser.funcs.items()):
+      Parser.funcs[signature] = getattr(func, 'untimed', func)
+    self.refresh()
+
+  # Drop everything that holds on to resolved overloads
+  def refresh(self):
+    Parser._cache.clear()
+    clearCaches()
+
+  def reset(self):
+    self.dispatch.clear()
+    self.steps.clear()
+
+  def snapshot(self):
+    return {
+      'dispatch': dict(((b.__name__, v.__name__), t.summary()) for (b, v), t in self.dispatch.items()),
+      'steps': dict((k, t.summary()) for k, t in self.steps.items()),
+    }
+
+  def timeDispatch(self, signature, func):
+    if hasattr(func, 'untimed') or isForwarding(signature):
+      return func
+    table = self.dispatch
+
+    @wraps(func)
+    def timed(base, var, fallback):
+      start = perf_counter_ns()
+      failed = True
+      try:
+        res = func(base, var, fallback)
+        failed = False
+        return res
+      finally:
+        key = type(base), type(var)
+        timing = table.get(key)
+        if timing is None:
+          timing = table[key] = Timing()
+        timing.add(perf_counter_ns() - start, failed)
+
+    timed.untimed = func
+    return timed
+
+  def timeStep(self, proc, index, step):
+    base = proc.templates[index]
+    # Nested Processors time their own steps, async ones would only time the call
+    if isinstance(base, Processor) or iscoroutinefunction(base):
+      return step
+    key = '%s [%d]'%(' | '.join(map(describe, proc.templates)), index)
+    table = self.steps
+
+    def timed(var, fallback):
+      start = perf_counter_ns()
+      failed = True
+      try:
+        res = step(var, fallback)
+        failed = False
+        return res
+      finally:
+        timing = table.get(key)
+        if timing is None:
+          timing = table[key] = Timing()
+        timing.add(perf_counter_ns() - start, failed)
+
+    return timed
+
+stats = Stats()
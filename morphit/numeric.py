@@ -0,0 +1,60 @@
+"""
+Numeric string parsing.
+
+A NumberFormat is a compiled set of cleanup rules (decimal separator,
+thousands separators, currency symbols). Strings that are already clean
+numbers take the plain float() path; only the rest go through cleanup.
+"""
+
+import re
+
+class NumberFormat():
+  """
+  Callable str -> number. Unless strict, anything that isn't a digit, '-' or
+  the decimal separator is dropped (legacy Parser behaviour, '$10,000.00'),
+  and several '.' in what's left are read as thousands separators.
+  """
+  def __init__(self, target=float, decimal='.', thousands='', currency='', strict=False):
+    self.target = target
+    self.decimal = decimal
+    self.thousands = thousands
+    self.currency = currency
+    self.strict = strict
+    dec = re.escape(decimal)
+    self.clean = re.compile(r'-?[0-9]+(?:%s[0-9]*)?|-?%s[0-9]+'%(dec, dec)).fullmatch
+    table = dict((c, None) for c in ' ' + thousands + currency)
+    if decimal != '.':
+      table[decimal] = '.'
+    self.table = str.maketrans(table)
+    self.strip = re.compile('[^0-9.-]').sub
+
+  def __call__(self, var):
+    return self.parse(var, self.target)
+
+  def parse(self, var, target):
+    if self.clean(var):
+      if self.decimal != '.':
+        var = var.replace(self.decimal, '.')
+      return target(float(var))
+    var = var.translate(self.table)
+    try:
+      if(var == ''): var = '0'
+      if not self.strict:
+        var = self.strip('', var) # Adds support for currency
+      if(var.count('.')>1):var = var.replace('.','')
+      return target(float(var))
+    except Exception as e:
+      raise ValueError("Unable to cast %s -> %s"%(var, target))
+
+  def __repr__(self):
+    return 'NumberFormat(%s, decimal=%r, thousands=%r, currency=%r%s)'%(
+      self.target.__name__, self.decimal, self.thousands, self.currency,
+      ', strict=True' if self.strict else '')
+
+NumberFormats = {
+  'default': NumberFormat(),
+  'us':      NumberFormat(thousands=',', currency='$'),
+  'eu':      NumberFormat(decimal=',', thousands='. ', currency='€'),
+  'ch':      NumberFormat(thousands="'", currency='CHF'),
+  'in':      NumberFormat(thousands=',', currency='₹'),
+}
@@ -0,0 +1,102 @@
+"""
+Process pool execution for Processor.map.
+
+Templates routinely hold lambdas, Processors and local functions which the
+stdlib pickle can't send to a worker. Pools use the configured start method
+(multiprocessing.set_start_method) unless a context is passed. With 'fork'
+the converter is handed to the pool initializer and inherited by the workers
+without pickling at all. Otherwise it is pickled, with cloudpickle (when
+installed) as a fallback for lambdas.
+"""
+
+import pickle
+import multiprocessing
+
+# Converter of the current worker process, set once by initWorker
+worker = None
+
+class Compiled():
+  """Parser.compile(template) that pickles as the template, compiled again by the worker"""
+  def __init__(self, template):
+    from .utils import Parser
+    self.template = template
+    self.convert = Parser.compile(template)
+
+  def __call__(self, var, fallback=None):
+    return self.convert(var, fallback)
+
+  def __getstate__(self):
+    return {'template': self.template}
+
+  def __setstate__(self, state):
+    self.__init__(state['template'])
+
+def dumps(convert):
+  try:
+    return pickle.dumps(convert), pickle.loads
+  except Exception as e:
+    try:
+      import cloudpickle
+    except ImportError:
+      raise TypeError(
+        "Unable to send %r to worker processes (%s). Use module level "
+        "functions in the template, install cloudpickle or use the 'fork' "
+        "start method where the platform supports it."%(convert, e))
+    return cloudpickle.dumps(convert), cloudpickle.loads
+
+def initWorker(convert, loads=None):
+  global worker
+  worker = loads(convert) if loads else convert
+
+def runChunk(chunk):
+  return [worker(record) for record in chunk]
+
+def chunked(records, chunksize):
+  chunk = []
+  for record in records:
+    chunk.append(record)
+    if len(chunk) == chunksize:
+      yield chunk
+      chunk = []
+  if chunk:
+    yield chunk
+
+def threadMap(convert, records, workers, chunksize):
+  from concurrent.futures import ThreadPoolExecutor
+  run = lambda chunk: [convert(record) for record in chunk]
+  with ThreadPoolExecutor(workers) as pool:
+    return [r for chunk in pool.map(run, chunked(records, chunksize)) for r in chunk]
+
+# multiprocessing context for a start method name, a context or None (the
+# configured method)
+def getContext(context):
+  if hasattr(context, 'Pool'):
+    return context
+  return multiprocessing.get_context(context)
+
+def parallelMap(convert, records, workers=None, chunksize=None, executor='process', context=None):
+  """
+  Ordered map of convert over records on a pool of worker processes, or of
+  threads with executor='thread'. workers defaults to os.cpu_count(),
+  workers=1 runs in the calling thread. context is a multiprocessing context
+  or start method name ('fork', 'spawn', 'forkserver') for the process pool.
+  """
+  if executor not in ('process', 'thread'):
+    raise ValueError("executor must be 'process' or 'thread', got %r"%(executor,))
+  if context is not None and executor == 'thread':
+    raise ValueError("context is for executor='process' pools, got %r"%(context,))
+  workers = workers or multiprocessing.cpu_count()
+  if workers == 1:
+    return [convert(record) for record in records]
+  if chunksize is None:
+    if not hasattr(records, '__len__'):
+      records = list(records)
+    chunksize = max(1, min(1024, len(records) // (workers * 4)))
+  if executor == 'thread':
+    return threadMap(convert, records, workers, chunksize)
+
+  ctx = getContext(context)
+  initargs = (convert,) if ctx.get_start_method() == 'fork' else dumps(convert)
+
+  with ctx.Pool(workers, initWorker, initargs) as pool:
+    return [r for chunk in pool.imap(runChunk, chunked(records, chunksize)) for r in chunk]
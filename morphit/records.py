@@ -0,0 +1,120 @@
+"""
+Compact record classes generated from dict templates.
+
+Parser.record(template) builds a class with one slot per template key
+(kind='slots') or a namedtuple (kind='tuple'). The class is a template in its
+own right: Parser(cls, record) and Processor(cls) convert every field with the
+compiled template and build the instance directly, no intermediate dict.
+Instances take a fraction of the memory of the equivalent dict.
+"""
+
+from keyword import iskeyword
+from collections import namedtuple
+
+MISSING = object()
+
+# Metaclass of every record class, the Parser overloads dispatch on it
+class RecordMeta(type):
+  pass
+
+# Class attributes start with _ so they can't clash with a field
+class Record(metaclass=RecordMeta):
+  """Base of slots records, _fields holds the template keys in order"""
+  __slots__ = ()
+  _fields = ()
+  _template = {}
+
+  def _asdict(self):
+    return dict(zip(self._fields, self))
+
+  def __iter__(self):
+    for k in self._fields:
+      yield getattr(self, k)
+
+  def __eq__(self, other):
+    if type(other) is not type(self):
+      return NotImplemented
+    return tuple(self) == tuple(other)
+
+  def __hash__(self):
+    return hash(tuple(self))
+
+  def __repr__(self):
+    return '%s(%s)'%(type(self).__name__, ', '.join('%s=%r'%(k, v) for k, v in zip(self._fields, self)))
+
+  def __getstate__(self):
+    return tuple(self)
+
+  def __setstate__(self, state):
+    for k, v in zip(self._fields, state):
+      object.__setattr__(self, k, v)
+
+def checkFields(template, name):
+  if not isinstance(template, dict):
+    raise TypeError("Record templates must be dicts, got %r"%(template,))
+  for k in template:
+    if not isinstance(k, str) or not k.isidentifier() or iskeyword(k) or k.startswith('_'):
+      raise ValueError("%s: %r can't be a record field, keys must be identifiers without a leading _"%(name, k))
+  return tuple(template)
+
+# __init__(self, a=None, b=None): self.a = a ..., compiled like namedtuple's
+def slotsInit(fields):
+  args = ''.join(', %s=None'%k for k in fields)
+  body = ''.join('\n  self.%s = %s'%(k, k) for k in fields) or '\n  pass'
+  scope = {}
+  exec('def __init__(self%s):%s'%(args, body), scope)
+  return scope['__init__']
+
+# fromDict(var, fallback) -> cls(c0(var['a'], fallback), ...), one expression
+# per field with no loop, missing keys pass None
+def dictInit(cls, children):
+  lines = ''.join("\n  v = var.get(%r, MISSING)\n  a%d = None if v is MISSING else c%d(0.0 if v == 'N/A' else v, fallback)"%(k, i, i)
+                  for i, (k, _) in enumerate(children))
+  scope = dict(('c%d'%i, child) for i, (_, child) in enumerate(children))
+  scope.update(cls=cls, MISSING=MISSING, new=tuple.__new__)
+  args = ', '.join('a%d'%i for i in range(len(children)))
+  # namedtuple's __new__ is python code, tuple records skip it
+  make = 'new(cls, (%s,))'%args if issubclass(cls, tuple) and children else 'cls(%s)'%args
+  exec('def fromDict(var, fallback):%s\n  return %s'%(lines, make), scope)
+  return scope['fromDict']
+
+# Builds instances of cls from dicts (or json strings), sequences or cls itself
+def recordNode(cls):
+  from .compiler import compileNode
+  from .utils import loadsDict
+  children = [(k, compileNode(0.0 if v == 'N/A' else v, False)) for k, v in cls._template.items()]
+  size = len(children)
+  fromDict = dictInit(cls, children)
+
+  def node(var, fallback):
+    if type(var) is dict:
+      return fromDict(var, fallback)
+    if type(var) is cls:
+      return var
+    if isinstance(var, str):
+      var = loadsDict(var)
+    if isinstance(var, dict):
+      return fromDict(var, fallback)
+    if isinstance(var, (list, tuple)):
+      return cls(*[children[i][1](var[i], fallback) for i in range(min(size, len(var)))])
+    raise ValueError("Unable to cast %s -> %s"%(type(var).__name__, cls.__name__))
+  return node
+
+def recordClass(template, name='Record', kind='slots', module=None):
+  """
+  Record class for a dict template. kind='slots' gives a Record subclass with
+  __slots__ (attribute access, _asdict(), iteration in field order),
+  kind='tuple' a namedtuple subclass. Missing keys become None.
+  """
+  fields = checkFields(template, name)
+  ns = {'__slots__': (), '_template': template, '__module__': module or __name__}
+  if kind == 'slots':
+    ns.update(__slots__=fields, _fields=fields, __init__=slotsInit(fields))
+    bases = (Record,)
+  elif kind == 'tuple':
+    bases = (namedtuple(name, fields, defaults=(None,) * len(fields), module=module),)
+  else:
+    raise ValueError("kind must be 'slots' or 'tuple', got %r"%(kind,))
+  cls = RecordMeta(name, bases, ns)
+  cls._convert = staticmethod(recordNode(cls))
+  return cls
@@ -0,0 +1,196 @@
+"""
+JSON-lines sources for Processor.
+"""
+
+import os, json, mmap, struct
+from array import array
+
+CHUNKSIZE = 1 << 16
+
+class JsonLines():
+  """
+  Lazily reads a JSON-lines path or file object and yields each record run
+  through convert. The file is read chunksize bytes at a time so memory stays
+  bounded by the longest line, not the file size.
+
+  errors: 'raise' on a malformed line, 'skip' it, or 'collect' it into
+  self.malformed as (line number, line, exception) tuples.
+  """
+  def __init__(self, source, convert=None, chunksize=CHUNKSIZE, errors='raise'):
+    if errors not in ('raise', 'skip', 'collect'):
+      raise ValueError("errors must be 'raise', 'skip' or 'collect', got %r"%(errors,))
+    self.source = source
+    self.convert = convert
+    self.chunksize = chunksize
+    self.errors = errors
+    self.malformed = []
+
+  def __iter__(self):
+    if isinstance(self.source, (str, bytes, os.PathLike)):
+      with open(self.source, 'rb') as fh:
+        for record in self.records(fh):
+          yield record
+    else:
+      for record in self.records(self.source):
+        yield record
+
+  def lines(self, fh):
+    """Yields complete lines, stitching lines that straddle chunk boundaries"""
+    # Pieces of the unfinished line, joined once its newline arrives so a
+    # line spanning many chunks isn't copied once per chunk
+    pending = []
+    empty = None
+    while True:
+      chunk = fh.read(self.chunksize)
+      if not chunk:
+        break
+      empty = chunk[:0]
+      parts = chunk.split(b'\n' if isinstance(chunk, bytes) else '\n')
+      if len(parts) == 1:
+        pending.append(chunk)
+        continue
+      if pending:
+        pending.append(parts[0])
+        parts[0] = empty.join(pending)
+      pending = [parts.pop()]
+      for line in parts:
+        yield line
+    if pending:
+      tail = empty.join(pending)
+      if tail:
+        yield tail
+
+  def records(self, fh):
+    convert = self.convert
+    for lineno, line in enumerate(self.lines(fh), 1):
+      if not line.strip():
+        continue
+      try:
+        record = json.loads(line)
+      except ValueError as e:
+        if self.errors == 'raise':
+          raise ValueError("Malformed json on line %d: %s"%(lineno, e))
+        if self.errors == 'collect':
+          self.malformed.append((lineno, line, e))
+        continue
+      yield convert(record) if convert else record
+
+INDEX_MAGIC = b'MORPHIDX'
+# 2: long whitespace-only lines aren't indexed
+INDEX_VERSION = 2
+# Bytes bytes.strip() removes
+BLANK = frozenset(b' \t\n\r\x0b\x0c')
+
+class MappedLines():
+  """
+  Random access to the records of a JSON-lines file. The file is memory
+  mapped and indexed once: an array of the byte offset every record starts
+  at (8 bytes per line), blank lines aren't records. len(), records[i],
+  records[i:j] (a view with the same mapping) and iteration slice the mapping
+  and parse only the records that are accessed, through convert when given.
+
+  index: None keeps the index in memory, True saves it next to the file
+  (path + '.idx'), a path saves it there. A saved index is reused while the
+  file's size and mtime match it, otherwise it's rebuilt.
+  """
+  def __init__(self, path, convert=None, index=None):
+    self.path = os.fspath(path)
+    self.convert = convert
+    with open(self.path, 'rb') as fh:
+      size = os.fstat(fh.fileno()).st_size
+      # mmap can't map an empty file
+      self.map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+    if index is True:
+      index = self.path + '.idx'
+    self.indexPath = os.fspath(index) if index else None
+    self.offsets = self.loadIndex() if self.indexPath else None
+    if self.offsets is None:
+      self.offsets = self.buildIndex()
+      if self.indexPath:
+        self.saveIndex()
+
+  def buildIndex(self):
+    mm = self.map
+    find = mm.find
+    size = len(mm)
+    offsets = array('Q')
+    start = 0
+    while start < size:
+      end = find(b'\n', start)
+      if end == -1:
+        end = size
+      # Lines are only copied out when they start with whitespace
+      if (end > start and mm[start] not in BLANK) or mm[start:end].strip():
+        offsets.append(start)
+      start = end + 1
+    return offsets
+
+  # (size, mtime) the saved index has to match
+  def fileStamp(self):
+    st = os.stat(self.path)
+    return st.st_size, st.st_mtime_ns
+
+  def saveIndex(self):
+    size, mtime = self.fileStamp()
+    tmp = self.indexPath + '.tmp'
+    with open(tmp, 'wb') as fh:
+      fh.write(INDEX_MAGIC + struct.pack('<IQQQ', INDEX_VERSION, size, mtime, len(self.offsets)))
+      self.offsets.tofile(fh)
+    os.replace(tmp, self.indexPath)
+
+  def loadIndex(self):
+    try:
+      fh = open(self.indexPath, 'rb')
+    except FileNotFoundError:
+      return None
+    with fh:
+      head = fh.read(len(INDEX_MAGIC) + 28)
+      if len(head) != len(INDEX_MAGIC) + 28 or not head.startswith(INDEX_MAGIC):
+        return None
+      version, size, mtime, count = struct.unpack('<IQQQ', head[len(INDEX_MAGIC):])
+      if version != INDEX_VERSION or (size, mtime) != self.fileStamp():
+        return None
+      offsets = array('Q')
+      try:
+        offsets.fromfile(fh, count)
+      except EOFError:
+        return None
+      return offsets
+
+  def __len__(self):
+    return len(self.offsets)
+
+  def line(self, i):
+    """Raw bytes of record i"""
+    start = self.offsets[i]
+    end = self.map.find(b'\n', start)
+    return self.map[start:end if end != -1 else len(self.map)]
+
+  def record(self, i):
+    try:
+      record = json.loads(self.line(i))
+    except ValueError as e:
+      raise ValueError("Malformed json in record %d: %s"%(i if i >= 0 else len(self) + i, e))
+    return self.convert(record) if self.convert else record
+
+  def __getitem__(self, i):
+    if isinstance(i, slice):
+      view = object.__new__(MappedLines)
+      view.__dict__.update(self.__dict__)
+      view.offsets = self.offsets[i]
+      return view
+    return self.record(i)
+
+  def __iter__(self):
+    for i in range(len(self.offsets)):
+      yield self.record(i)
+
+  def close(self):
+    if isinstance(self.map, mmap.mmap):
+      self.map.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
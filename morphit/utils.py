@@ -2,20 +2,87 @@
 General purpose utility library..
 """
 
-import re, string, json, iso8601
+import sys, json
+from inspect import isawaitable
+from contextvars import ContextVar
+from weakref import WeakSet
 from types import LambdaType, FunctionType
 from datetime import datetime, date, time, timezone
 import time as pytime
-from multipledispatch import dispatch
+from multipledispatch import Dispatcher
+from multipledispatch import dispatch as _dispatch
+from multipledispatch.core import global_namespace
+from multipledispatch.conflict import ordering
+from .dates import DateParser
+from .numeric import NumberFormat, NumberFormats
+from .literals import loads
+from .records import RecordMeta, Record
+from .memo import Memo
 
 def getLast(results): return results[-1]
 def getRest(results): return results[1:]
 def getMergedDicts(results): return dict(i for r in results[1:] for i in r.items())
 
+# Incremental aggregators, Processor feeds each step's output as it runs:
+#   state = start(var); state = step(state, output)...; finish(state)
+# State is threaded through the calls so one instance serves every Processor.
+class Aggregator():
+  """Collects every result and hands the list to fn, like the old aggregators"""
+  def __init__(self, fn=None):
+    self.fn = fn
+
+  def start(self, var):
+    return [var]
+
+  def step(self, state, value):
+    state.append(value)
+    return state
+
+  def finish(self, state):
+    return self.fn(state)
+
+  # Whole results list at once, [input, output1, output2, ...]
+  def __call__(self, results):
+    state = self.start(results[0])
+    for r in results[1:]:
+      state = self.step(state, r)
+    return self.finish(state)
+
+# Only the current value is kept
+class ReduceAggregator(Aggregator):
+  def start(self, var):
+    return var
+
+  def step(self, state, value):
+    return value
+
+  def finish(self, state):
+    return state
+
+# Every output except the input
+class MapAggregator(Aggregator):
+  def start(self, var):
+    return []
+
+  def finish(self, state):
+    return state
+
+# Items of every output merged into one dict, later keys win
+class MergeAggregator(Aggregator):
+  def start(self, var):
+    return {}
+
+  def step(self, state, value):
+    state.update(value.items())
+    return state
+
+  def finish(self, state):
+    return state
+
 Aggregators = {
-  'map': getRest,
-  'reduce': getLast,
-  'merge': getMergedDicts,
+  'map': MapAggregator(getRest),
+  'reduce': ReduceAggregator(getLast),
+  'merge': MergeAggregator(getMergedDicts),
 }
 
 Instances = {
@@ -36,43 +103,345 @@ Types = {
   'function': FunctionType,
 }
 
+# Stand-in instances for type bases that can't be built without arguments
+Prototypes = {
+  Types['datetime']: Instances['datetime'],
+  Types['date']:     Instances['date'],
+  Types['time']:     Instances['time'],
+}
+
+# Resolved overloads, cleared whenever a new overload is registered
+# (base type, input type) -> implementation, for Parser(base, var)
+Resolved = {}
+# (target type, input type) -> (prototype, implementation), for Parser(type, var)
+TypeTable = {}
+
+# Shared date parsers, compiled templates get one per field
+parseDatetime = DateParser(Types['datetime'])
+parseDate = DateParser(Types['date'])
+
+def prototype(base):
+  return Prototypes[base] if base in Prototypes else base()
+
+def clearCaches():
+  Resolved.clear()
+  TypeTable.clear()
+  Processor.generation += 1
+
+# str -> list, json/python/unicode quoted lists
+def loadsList(var):
+  # Guess if str is well formatted
+  if(var.startswith('[') and var.endswith(']')):
+    return loads(var)
+  return [var]
+
+# str -> dict
+def loadsDict(var):
+  return loads(var)
+
+# See "Date Time String Format" in the ECMA-262 specification.
+# datetime.date -> str (iso format)
+def isoDate(var):
+  return var.isoformat()
+
+# datetime -> str, ms precision and Z for utc
+def isoDatetime(var):
+  r = var.isoformat(timespec='milliseconds') if var.microsecond else var.isoformat()
+  if r.endswith('+00:00'):
+      r = r[:-6] + 'Z'
+  return r
+
+# datetime.time -> str, ms precision
+def isoTime(var):
+  # TODO: test error
+  if var.utcoffset() is not None:
+      raise ValueError("JSON can't represent timezone-aware times.")
+
+  if var.microsecond:
+      return var.isoformat(timespec='milliseconds')
+  return var.isoformat()
+
+# Zero argument callables are resolved, anything else unknown is null
+def callOrNone(o):
+  code = getattr(o, '__code__', None)
+  if code is not None and code.co_argcount == 0:
+    return o()
+  return None
+
 class JSONEncoder(json.JSONEncoder):
     """JSONEncoder subclass that knows how to encode date/time, decimal types, and UUIDs."""
 
+    # type -> handler(o), see register()
+    handlers = {
+      Types['datetime']: isoDatetime,
+      Types['date']:     isoDate,
+      Types['time']:     isoTime,
+      Record:            Record._asdict,
+    }
+    # Handlers found for other types (subclasses, callables), reset by register()
+    resolved = {}
+
     # This function is called when the base serializer doesn't know wtd with type
     def default(self, o):
-        # See "Date Time String Format" in the ECMA-262 specification.
-        if (type(o) in [datetime, time, date]):
-          return Parser(str, o)
-        elif(callable(o) and o.__code__.co_argcount==0):
-          return o()
-        else:
-          return None
-
+        handler = self.handlers.get(type(o))
+        if handler is None:
+          handler = self.resolved.get(type(o))
+          if handler is None:
+            handler = self.resolve(type(o))
+        return handler(o)
+
+    @classmethod
+    def resolve(cls, t):
+        handler = callOrNone
+        for parent in t.__mro__[1:]:
+          if parent in cls.handlers:
+            handler = cls.handlers[parent]
+            break
+        cls.resolved[t] = handler
+        return handler
+
+    @classmethod
+    def register(cls, t, handler):
+        """Encode instances of t (and subclasses) as handler(o)"""
+        cls.handlers[t] = handler
+        cls.resolved.clear()
+        return handler
+
+    @staticmethod
+    def compile(template, **kwargs):
+        """Returns encode(obj) -> str that converts the template's known fields up front"""
+        from .encoder import compileEncoder
+        return compileEncoder(template, **kwargs)
+
+
+# Same as json.dumps(var, cls=JSONEncoder) without building an encoder per call
+encoder = JSONEncoder()
+
+# Parser is a multipledispatch Dispatcher with a few template level helpers
+class ParserDispatcher(Dispatcher):
+  __slots__ = ()
+
+  # instrument(signature, func) -> func, set by morphit.stats while enabled
+  instrument = None
+  # Signatures registered by this module, the tests check them for ambiguities
+  checked = frozenset()
+
+  # The ambiguity scan is cubic in the number of overloads, it only runs
+  # once overloads other than morphit's own are registered
+  def reorder(self, *args, **kwargs):
+    if self.funcs.keys() == self.checked:
+      self._ordering = od = ordering(self.funcs)
+      return od
+    return Dispatcher.reorder(self, *args, **kwargs)
+
+  def add(self, signature, func):
+    if self.instrument is not None:
+      func = self.instrument(signature, func)
+    Dispatcher.add(self, signature, func)
+    clearCaches()
+
+  def compile(self, template, inplace=True, errors='raise', lazy=False):
+    """
+    Resolve a template once and return a callable(var, fallback=None). With
+    errors='collect' it never raises and returns (value, [ConversionError]),
+    with lazy=True it returns read-only proxies that convert fields on first
+    access (morphit.lazy)
+    """
+    if lazy:
+      if errors != 'raise':
+        raise ValueError("lazy templates raise on the read that fails, errors=%r isn't supported"%(errors,))
+      from .lazy import lazyTemplate
+      return lazyTemplate(template)
+    if errors == 'collect':
+      from .collect import collectTemplate
+      return collectTemplate(template, inplace)
+    if errors != 'raise':
+      raise ValueError("errors must be 'raise' or 'collect', got %r"%(errors,))
+    from .compiler import compileTemplate
+    return compileTemplate(template, inplace)
+
+  def map(self, template, records, workers=None, chunksize=None, executor='process', context=None):
+    """
+    Parser(template, record) for every record on a pool of worker processes
+    (context: multiprocessing context or start method) or threads
+    """
+    from .parallel import parallelMap, Compiled
+    if executor == 'thread':
+      from .frozen import freezeTemplate
+      return parallelMap(self.compile(freezeTemplate(template)), records, workers, chunksize, executor, context)
+    return parallelMap(Compiled(template), records, workers, chunksize, executor, context)
+
+  def record(self, template, name='Record', kind='slots'):
+    """
+    Class with one __slots__ field (kind='tuple': namedtuple) per key of a dict
+    template, Parser(cls, record) converts straight into instances of it
+    """
+    from .records import recordClass
+    return recordClass(template, name, kind, sys._getframe(1).f_globals.get('__name__'))
+
+  def array(self, base, values, engine='auto'):
+    """
+    Convert a whole sequence to float, int, bool or datetime, a numpy array
+    when numpy is installed (engine='python' for the list Parser([base], values))
+    """
+    from .vectorized import toArray
+    return toArray(base, values, engine)
+
+  def batch(self, template, records, fallback=None, columns=False, errors='raise'):
+    """
+    Convert an iterable of dict/tuple records column by column. With
+    errors='collect' it never raises and returns (rows, [ConversionError])
+    """
+    from .compiler import batchTemplate
+    return batchTemplate(template, records, fallback, columns, errors)
+
+# Every overload below registers into this namespace. The dispatcher is also
+# the global 'Parser', so @multipledispatch.dispatch(..., object) def Parser
+# in user code keeps extending it
+Parsers = {'Parser': ParserDispatcher('Parser')}
+global_namespace['Parser'] = Parsers['Parser']
+
+def dispatch(*types):
+  return _dispatch(*types, namespace=Parsers)
+
+
+# True while acall runs a step: Processors with async steps nested in its
+# templates return their acall() coroutine, which acall then awaits
+Awaiting = ContextVar('Awaiting', default=False)
 
 # Returns a function that parses to a given type (base)
+# inplace=False never mutates the input, dicts are copied only along the
+# paths a template actually converts
 class Processor():
-  def __init__(self, startBase, aggregator='reduce'):
+  def __init__(self, startBase, aggregator='reduce', inplace=True):
     # aggregator=='merge' requires an object to be resolved
-    if(aggregator in Aggregators):
-      self.aggregator = Aggregators[aggregator]
+    if(hasattr(aggregator, 'step') and hasattr(aggregator, 'finish')):
+      self.aggregator = aggregator
+    elif(aggregator in Aggregators):
+      agg = Aggregators[aggregator]
+      # Plain functions registered by name get the full results list
+      self.aggregator = agg if hasattr(agg, 'step') and hasattr(agg, 'finish') else Aggregator(agg)
     else:
-      self.aggregator = Processor(aggregator)
-    self.templates = []
-    self.then(startBase)
-
-
+      # Custom callables get the full results list
+      self.aggregator = Aggregator(Processor(aggregator))
+    self.inplace = inplace
+    self.compiled = None
+    self.plan = None
+    self.awaits = False
+    self.templates = [startBase]
+    # Bumped by invalidate(), steps and plans built for another version are stale
+    self.version = 0
+    # Processors whose steps depend on this one's templates, see track()
+    self.dependents = WeakSet()
+
+  # Bumped by clearCaches() (Parser.add), every Processor's steps are stale
+  generation = 0
+  # instrument(processor, index, step) -> step, set by morphit.stats while enabled
+  instrument = None
+  # FrozenProcessor's templates are private copies, see freeze()
+  frozen = False
 
   def __call__(self, var, fallback=None, output_default={}):
     # Allow the original fallback in a pipe to be passed to parser
     # Used for chained functions with reference to original values
     curry = var if fallback is None else fallback
-    results = [var]
-    for base in self.templates:
-      results.append(Parser(base, results[-1], curry))
-    output = self.aggregator(results)
-    return output
-
+    # Without a curry nested Processors fall back to their own input, so
+    # they can't be flattened into this chain
+    steps = self.optimize() if curry is not None else self.steps()
+    if self.awaits:
+      if Awaiting.get():
+        return self.acall(var, fallback)
+      raise TypeError("Processor has async steps, use await processor.acall(var)")
+    agg = self.aggregator
+    state = agg.start(var)
+    for step in steps:
+      var = step(var, curry)
+      state = agg.step(state, var)
+    return agg.finish(state)
+
+  async def acall(self, var, fallback=None):
+    """
+    Same as calling the Processor, awaiting the steps that return awaitables,
+    and the coroutine functions and async Processors in dict and list templates
+    """
+    from .aio import settle
+    curry = var if fallback is None else fallback
+    steps = self.optimize() if curry is not None else self.steps()
+    agg = self.aggregator
+    state = agg.start(var)
+    for step in steps:
+      if isinstance(step, Processor):
+        var = await step.acall(var, curry)
+      elif self.awaits:
+        token = Awaiting.set(True)
+        try:
+          var = step(var, curry)
+        finally:
+          Awaiting.reset(token)
+        var = await settle(var)
+      else:
+        var = step(var, curry)
+        if isawaitable(var):
+          var = await var
+      state = agg.step(state, var)
+    return agg.finish(state)
+
+  # This Processor's templates changed, and so did those of every Processor
+  # that inlined it or holds it in a template
+  def invalidate(self):
+    self.version += 1
+    for proc in list(self.dependents):
+      proc.invalidate()
+
+  # Finds async steps, and registers this Processor with the ones nested in
+  # its templates so their then() invalidates it too
+  def track(self):
+    from .compiler import awaitsIn
+    nested = []
+    self.awaits = awaitsIn(self, nested)
+    for proc in nested:
+      if not proc.frozen:
+        proc.dependents.add(self)
+
+  # One step(var, fallback) per template, rebuilt after then()
+  def steps(self):
+    compiled = self.compiled
+    if compiled is None or compiled[0] != Processor.generation or compiled[1] != self.version:
+      from .compiler import compileStep
+      version = self.version
+      steps = [compileStep(base, self.inplace) for base in self.templates]
+      if Processor.instrument is not None:
+        steps = [Processor.instrument(self, i, step) for i, step in enumerate(steps)]
+      self.track()
+      self.compiled = compiled = (Processor.generation, version, steps)
+    return compiled[2]
+
+  # Flattened chain with identity steps dropped and type conversions fused,
+  # built before the first call, see compiler.optimizeChain. Rebuilt after
+  # then() on this Processor or on one it inlined
+  def optimize(self):
+    # Stats are kept per template, chains run unflattened while they're on
+    if Processor.instrument is not None:
+      return self.steps()
+    plan = self.plan
+    if plan is None or plan[0] != Processor.generation or plan[1] != self.version:
+      from .compiler import optimizeChain
+      version = self.version
+      steps = optimizeChain(self)
+      self.track()
+      self.plan = plan = (Processor.generation, version, steps)
+    return plan[2]
+
+  # Compiled steps are closures, rebuilt on the first call after unpickling
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    state['compiled'] = state['plan'] = None
+    del state['dependents']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self.dependents = WeakSet()
 
   @property
   def __code__(self):
@@ -86,14 +455,70 @@ class Processor():
       r.then(Processor(p))
     return r
 
+  @staticmethod
+  def infer(samples, max_samples=1000):
+    """Template for records like samples, built from the first max_samples"""
+    from .infer import inferTemplate
+    return inferTemplate(samples, max_samples)
+
   def then(self, base):
     self.templates.append(base)
+    self.invalidate()
     return self
 
+  def outOfPlace(self):
+    """Processor converting copies, shares the templates so then() still applies"""
+    view = Processor(None, self.aggregator, False)
+    view.templates = self.templates
+    self.dependents.add(view)
+    return view
+
+  def freeze(self):
+    """
+    FrozenProcessor with copies of the templates, compiled up front and never
+    changed afterwards, safe to share between threads
+    """
+    from .frozen import FrozenProcessor
+    return FrozenProcessor(self.templates, self.aggregator, self.inplace)
+
+  def map(self, records, workers=None, chunksize=None, executor='process', context=None):
+    """
+    Convert records on a pool of worker processes (context: multiprocessing
+    context or start method, the configured one by default) or with
+    executor='thread' on threads sharing a frozen copy. Results keep input order
+    """
+    from .parallel import parallelMap
+    return parallelMap(self.freeze() if executor == 'thread' else self, records, workers, chunksize, executor, context)
+
+  def amap(self, records, concurrency=8):
+    """
+    Async generator over acall(record) for an iterable or async iterable,
+    with up to concurrency records in flight. Results keep input order.
+    """
+    from .aio import orderedMap
+    return orderedMap(self.acall, records, concurrency)
+
+  def stream(self, source, chunksize=1 << 16, errors='raise'):
+    """Lazily convert every record of a JSON-lines path or file object"""
+    from .stream import JsonLines
+    return JsonLines(source, self, chunksize, errors)
+
+  def open(self, path, index=None):
+    """Memory mapped JSON-lines file, len(), indexing and slicing convert records on access"""
+    from .stream import MappedLines
+    return MappedLines(path, self, index)
+
 # Wrapper for fallback defaulting
 @dispatch(object, object)
 def Parser(base, var):
-  return Parser(base, var, None)
+  try:
+    impl = Resolved[type(base), type(var)]
+  except KeyError:
+    impl = Parser.dispatch(type(base), type(var), object)
+    if impl is None:
+      return Parser(base, var, None)
+    Resolved[type(base), type(var)] = impl
+  return impl(base, var, None)
 
 # OUTPUT: fallback to the type of input
 @dispatch(object, object, object)
@@ -124,29 +549,17 @@ def Parser(base, var, fallback):
 # datetime.date -> str (iso format)
 @dispatch(str, Types['date'], object)
 def Parser(base, var, fallback):
-  return var.isoformat()
+  return isoDate(var)
 
 # datetime -> str
 @dispatch(str, Types['datetime'], object)
 def Parser(base, var, fallback):
-  r = var.isoformat()
-  if var.microsecond:
-      r = r[:23] + r[26:]
-  if r.endswith('+00:00'):
-      r = r[:-6] + 'Z'
-  return r
+  return isoDatetime(var)
 
 # datetime.time -> string
 @dispatch(str, Types['time'], object)
 def Parser(base, var, fallback):
-  # TODO: test error
-  if var.utcoffset() is not None:
-      raise ValueError("JSON can't represent timezone-aware times.")
-
-  r = var.isoformat()
-  if var.microsecond:
-      r = r[:12]
-  return r
+  return isoTime(var)
 
 # any -> func(any)
 @dispatch((Types['function'], Types['lambda']), object, object)
@@ -160,19 +573,24 @@ def Parser(base, var, fallback):
 def Parser(base, var, fallback):
   return base(var, fallback)
 
+# str -> datetime (float/int timestamps or iso8601)
 @dispatch(Types['datetime'], str, object)
 def Parser(base, var, fallback):
-  tmp=var.split('.')
-  if(len(tmp)==2 and tmp[0].isdigit() and tmp[1].isdigit()):
-    return Parser(base, float(var), fallback)
-  elif(var.isdigit()):
-    return Parser(base, int(var), fallback)
-  return iso8601.parse_date(var)
+  return parseDatetime(var)
 
 # str -> datetime.date
 @dispatch(Types['date'], str, object)
 def Parser(base, var, fallback):
-  return Parser(Instances['datetime'], var, fallback).date()
+  return parseDate(var)
+
+# str -> datetime.date/datetime with a field's own DateParser
+@dispatch(DateParser, str, object)
+def Parser(base, var, fallback):
+  return base(var)
+
+@dispatch(DateParser, object, object)
+def Parser(base, var, fallback):
+  return Parser(prototype(base.target), var, fallback)
 
 # int,float -> datetime.date
 @dispatch(Types['date'], (int, float), object)
@@ -182,15 +600,25 @@ def Parser(base, var, fallback):
   return datetime.fromtimestamp(var)
 
 # any -> type(any)
+# Looks up the overload for a prototype instance of the type rather than
+# building a new instance and dispatching again on every call
 @dispatch(type(str), (object), object)
 def Parser(base, var, fallback):
-  return Parser(base(), var, fallback)
+  try:
+    proto, impl = TypeTable[base, type(var)]
+  except KeyError:
+    proto = prototype(base)
+    impl = Parser.dispatch(type(proto), type(var), object)
+    if impl is None:
+      return Parser(proto, var, fallback)
+    TypeTable[base, type(var)] = (proto, impl)
+  return impl(proto, var, fallback)
 
 # OUTPUT: json
 # dict, array -> str(json)
 @dispatch((str), (dict, list, tuple), object)
 def Parser(base, var, fallback):
-  return json.dumps(var, cls=JSONEncoder)
+  return encoder.encode(var)
 
 # primitive -> array
 @dispatch((list, tuple), (float, int, str), object)
@@ -216,13 +644,7 @@ def Parser(base, var, fallback):
 # str -> list
 @dispatch(list, str, object)
 def Parser(base, var, fallback):
-  if("u'" in var or not '"' in var):
-    var = var.replace("u'", '"').replace("'", '"')
-  # Guess if str is well formatted
-  if(var.startswith('[') and var.endswith(']')):
-    tmp = json.loads(var)
-  else:
-    tmp = [var]
+  tmp = loadsList(var)
   if(len(base)>0):
     return [Parser(base[0], var_elem, fallback) for var_elem in tmp]
   return tmp
@@ -260,14 +682,26 @@ ValueError: invalid literal for int() with base 10: '150.0'
 # str -> float
 @dispatch((float, int), str, object)
 def Parser(base, var, fallback):
-  var = var.replace(' ','')
-  try:
-    if(var == ''): var = '0'
-    var = re.sub('[^0-9.-]', '', var) # Adds support for currency
-    if(var.count('.')>1):var = var.replace('.','')
-    return type(base)(float(var))
-  except Exception as e:
-    raise ValueError("Unable to cast %s -> %s"%(var, type(base)))
+  return NumberFormats['default'].parse(var, type(base))
+
+# str -> float/int with a field's own NumberFormat
+@dispatch(NumberFormat, str, object)
+def Parser(base, var, fallback):
+  return base(var)
+
+@dispatch(NumberFormat, object, object)
+def Parser(base, var, fallback):
+  return Parser(prototype(base.target), var, fallback)
+
+# dict, str(json), list, tuple -> record class instance
+@dispatch(RecordMeta, object, object)
+def Parser(base, var, fallback):
+  return base._convert(var, fallback)
+
+# scalar -> memoized conversion of the wrapped base
+@dispatch(Memo, object, object)
+def Parser(base, var, fallback):
+  return base(var, fallback)
 
 # OUTPUT: dict recursively. AKA: nested type formatting
 # dict -> dict
@@ -276,13 +710,15 @@ def Parser(base, var, fallback):
   for k in base.keys():
     if(k in var):
       if(var[k]=='N/A'):var[k]=0.0
-      if(base[k]=='N/A'):base[k]=0.0
-      var[k] = Parser(base[k], var[k], fallback)
+      # The template itself is never changed, it may be shared
+      var[k] = Parser(0.0 if base[k]=='N/A' else base[k], var[k], fallback)
   return var
 
 # OUTPUT: dict from json string
 # str -> dict
 @dispatch(dict, str, object)
 def Parser(base, var, fallback):
-  temp = json.loads(var.replace("u'", '"').replace("'", '"'))
+  temp = loadsDict(var)
   return Parser(base, temp, fallback)
+
+ParserDispatcher.checked = frozenset(Parser.funcs)
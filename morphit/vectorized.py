@@ -0,0 +1,143 @@
+"""
+Bulk conversion of numeric, boolean and timestamp sequences.
+
+Parser.array(float, values) converts a whole sequence at once. With numpy
+installed the result is a typed array (float64, int64, bool or
+datetime64[us]) built by numpy kernels, values of a single kind (all str,
+all numbers) never go through dispatch. Without numpy, or engine='python',
+it's the list Parser([base], values) returns.
+
+The kernels follow Parser's rules: strings that aren't clean numbers get the
+default NumberFormat cleanup ('$10,000.00'), int truncates like int(float(v)),
+'True'/'1'/'t'/'1.0' are the true strings and int epochs over 150000000000
+are ms. numpy has no timezones, epochs become UTC datetime64 while Parser
+returns local naive datetimes.
+"""
+
+from datetime import datetime, timezone
+from .numeric import NumberFormats
+
+TRUE = ['True', '1', 't', '1.0']
+TRUE_BYTES = [t.encode() for t in TRUE]
+MS_EPOCH = 150000000000
+DIGITS = frozenset('0123456789.-')
+
+Numpy = {}
+
+# numpy module, None when it isn't installed
+def numpy():
+  try:
+    return Numpy['module']
+  except KeyError:
+    try:
+      import numpy as np
+    except ImportError:
+      np = None
+    Numpy['module'] = np
+    return np
+
+def available():
+  return numpy() is not None
+
+# Elements of one kind take the bulk path, anything else is converted with Parser first
+def kinds(values):
+  return set(map(type, values))
+
+# Python objects of an array or sequence, numpy scalars would all go through dispatch
+def listOf(np, values):
+  return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+def pythonArray(base, values):
+  from .compiler import compileNode
+  return compileNode([base], False)(list(values), None)
+
+# str/number sequence -> float64, dirty strings cleaned one by one
+def floats(np, values):
+  if isinstance(values, np.ndarray) and values.dtype.kind in 'biuf':
+    return values.astype(np.float64)
+  values = listOf(np, values)
+  found = kinds(values)
+  if found <= set([int, float, bool]):
+    return np.array(values, dtype=np.float64)
+  fmt = NumberFormats['default']
+  if found == set([str]):
+    # Made of digits, '-' and '.' only, float() takes exactly the strings
+    # NumberFormat calls clean, one numpy parse covers all of them
+    if set(''.join(values)) <= DIGITS:
+      try:
+        return np.array(values, dtype=np.float64)
+      except ValueError:
+        pass
+    clean = fmt.clean
+    dirty = [i for i, v in enumerate(values) if not clean(v)]
+    for i in dirty:
+      values[i] = fmt.parse(values[i], float)
+    return np.array(values, dtype=np.float64)
+  return np.array(pythonArray(float, values), dtype=np.float64)
+
+def ints(np, values):
+  if isinstance(values, np.ndarray) and values.dtype.kind in 'biu':
+    return values.astype(np.int64)
+  values = listOf(np, values)
+  if kinds(values) <= set([int, bool]):
+    return np.array(values, dtype=np.int64)
+  # Parser(int, '1.5') is int(float('1.5')), truncation towards 0
+  return np.trunc(floats(np, values)).astype(np.int64)
+
+def bools(np, values):
+  if isinstance(values, np.ndarray):
+    if values.dtype.kind == 'U':
+      return np.isin(values, TRUE)
+    if values.dtype.kind == 'S':
+      return np.isin(values, TRUE_BYTES)
+    if values.dtype.kind in 'biuf':
+      return values != 0
+  values = listOf(np, values)
+  found = kinds(values)
+  if found == set([str]):
+    return np.isin(np.array(values), TRUE)
+  if found <= set([int, float, bool]):
+    return np.array(values, dtype=np.float64) != 0
+  return np.array(pythonArray(bool, values), dtype=bool)
+
+# epochs -> datetime64[us] UTC, ints over MS_EPOCH are ms, floats are seconds
+def datetimes(np, values):
+  if isinstance(values, np.ndarray) and values.dtype.kind in 'iu':
+    arr = values.astype(np.int64)
+  elif isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+    return np.round(values * 1e6).astype(np.int64).view('datetime64[us]')
+  else:
+    values = listOf(np, values)
+    found = kinds(values)
+    if found == set([int]):
+      arr = np.array(values, dtype=np.int64)
+    elif found == set([float]):
+      return np.round(np.array(values) * 1e6).astype(np.int64).view('datetime64[us]')
+    else:
+      # Parser's datetimes are local naive or aware, both go to UTC like the epochs
+      utc = [d.astimezone(timezone.utc).replace(tzinfo=None) for d in pythonArray(datetime, values)]
+      return np.array(utc, dtype='datetime64[us]')
+  return np.where(arr > MS_EPOCH, arr * 1000, arr * 1000000).view('datetime64[us]')
+
+Kernels = {
+  float:    floats,
+  int:      ints,
+  bool:     bools,
+  datetime: datetimes,
+}
+
+def toArray(base, values, engine='auto'):
+  """
+  Convert a sequence of values to base (float, int, bool or datetime).
+  engine: 'auto' (numpy when installed), 'numpy' or 'python'.
+  """
+  if base not in Kernels:
+    raise TypeError("No array conversion to %r, base must be one of float, int, bool, datetime"%(base,))
+  if engine not in ('auto', 'numpy', 'python'):
+    raise ValueError("engine must be 'auto', 'numpy' or 'python', got %r"%(engine,))
+  np = None if engine == 'python' else numpy()
+  if np is None:
+    if engine == 'numpy':
+      raise ImportError("engine='numpy' requires numpy, install it or use engine='auto'")
+    return pythonArray(base, values)
+  return Kernels[base](np, values)
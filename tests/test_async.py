@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from collections import OrderedDict
+from morphit import Processor
+
+async def lookup(key):
+  await asyncio.sleep(0)
+  return {'key': key, 'name': 'item-%s'%key}
+
+def lookupResult(key):
+  return {'key': key, 'name': 'item-%s'%key}
+
+async def delayed(record):
+  await asyncio.sleep(record['delay'])
+  return record['id']
+
+async def source(n):
+  for i in range(n):
+    await asyncio.sleep(0)
+    yield str(i)
+
+def collect(agen):
+  async def run():
+    return [r async for r in agen]
+  return asyncio.run(run())
+
+class TestAsync(unittest.TestCase):
+    def test_acall(self):
+      p = Processor(int).then(lookup).then(lambda d: d['name'])
+      self.assertEqual(asyncio.run(p.acall('3')), 'item-3')
+
+    def test_acall_nested_with_options(self):
+      async def scaled(partial, options={}):
+        return partial * options['scale']
+      inner = Processor(lambda d: d['n']).then(scaled)
+      p = Processor.flow([inner, str], aggregator='map')
+      self.assertEqual(asyncio.run(p.acall({'n': 2, 'scale': 3})), [6, '6'])
+
+    def test_sync_call_raises(self):
+      p = Processor(int).then(Processor(lookup))
+      self.assertRaises(TypeError, p, '3')
+      self.assertEqual(Processor(int)('3'), 3)
+
+    def test_nested_template_coroutines(self):
+      p = Processor({'user': lookup, 'ids': [lookup], 'n': int})
+      record = {'user': 1, 'ids': [2, 3], 'n': '4'}
+      self.assertRaises(TypeError, p, dict(record))
+      res = asyncio.run(p.acall(dict(record)))
+      self.assertEqual(res, {'user': lookupResult(1), 'ids': [lookupResult(2), lookupResult(3)], 'n': 4})
+      self.assertRaises(TypeError, Processor(int).then(Processor([lookup])), '1')
+      copy = Processor({'user': lookup}, inplace=False)
+      record = {'user': 5}
+      self.assertEqual(asyncio.run(copy.acall(record)), {'user': lookupResult(5)})
+      self.assertEqual(record, {'user': 5})
+
+    def test_nested_async_processors(self):
+      async def double(var):
+        await asyncio.sleep(0)
+        return var * 2
+      inner = Processor(double)
+      for p in [Processor({'a': inner}), Processor({'a': inner}, inplace=False),
+                Processor({'a': Processor({'b': [inner]})}), Processor([inner])]:
+        self.assertRaises(TypeError, p, {'a': 1})
+      self.assertEqual(asyncio.run(Processor({'a': inner}).acall({'a': 1})), {'a': 2})
+      self.assertEqual(asyncio.run(Processor({'a': inner}, inplace=False).acall({'a': 1})), {'a': 2})
+      nested = Processor({'a': Processor({'b': [inner]})})
+      self.assertEqual(asyncio.run(nested.acall({'a': {'b': [1, 2]}})), {'a': {'b': [2, 4]}})
+      self.assertEqual(asyncio.run(Processor([inner]).acall([3, 4])), [6, 8])
+      self.assertRaises(TypeError, inner, 1)
+
+    def test_template_subclasses(self):
+      p = Processor(OrderedDict(a=lookup))
+      self.assertRaises(TypeError, p, {'a': 1})
+      self.assertEqual(asyncio.run(p.acall({'a': 1})), {'a': lookupResult(1)})
+
+    def test_amap_keeps_order(self):
+      records = [{'id': i, 'delay': 0.001 * ((7 * i) % 5)} for i in range(20)]
+      p = Processor(delayed)
+      self.assertEqual(collect(p.amap(records, concurrency=4)), list(range(20)))
+
+    def test_amap_bounded_concurrency(self):
+      state = {'running': 0, 'peak': 0}
+      async def tracked(var):
+        state['running'] += 1
+        state['peak'] = max(state['peak'], state['running'])
+        await asyncio.sleep(0.001)
+        state['running'] -= 1
+        return var
+      out = collect(Processor(int).then(tracked).amap(source(30), concurrency=5))
+      self.assertEqual(out, list(range(30)))
+      self.assertEqual(state['peak'], 5)
+
+    def test_amap_error(self):
+      async def fail(var):
+        if var == 3:
+          raise KeyError(var)
+        await asyncio.sleep(0.001)
+        return var
+      p = Processor(int).then(fail)
+      self.assertRaises(KeyError, collect, p.amap(source(10), concurrency=3))
+      self.assertRaises(ValueError, collect, p.amap([], concurrency=0))
+
+if __name__ == '__main__':
+    unittest.main()
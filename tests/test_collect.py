@@ -0,0 +1,51 @@
+import unittest
+from datetime import datetime
+from morphit import Parser, ConversionError
+
+TEMPLATE = {
+  'price': float,
+  'count': 1,
+  'tags': [int],
+  'meta': {'at': datetime, 'raw': dict},
+}
+
+class TestCollect(unittest.TestCase):
+    def test_collect_keeps_converting(self):
+      convert = Parser.compile(TEMPLATE, errors='collect')
+      record = {'price': 'abc', 'count': '3', 'tags': ['1', 'x', '2'],
+                'meta': {'at': 1517408265547, 'raw': '{bad'}}
+      res, errors = convert(record)
+      self.assertEqual(res['price'], 'abc')
+      self.assertEqual(res['count'], 3)
+      self.assertEqual(res['tags'], [1, 'x', 2])
+      self.assertEqual(res['meta']['at'], datetime(2018, 1, 31, 6, 17, 45, 547000))
+      self.assertEqual([e.path for e in errors], [('price',), ('tags', 1), ('meta', 'raw')])
+      self.assertEqual(errors[0], ConversionError(('price',), 'abc', float,
+        "ValueError: Unable to cast  -> <class 'float'>"))
+      self.assertIs(errors[2].target, dict)
+
+    def test_clean_record_matches_compile(self):
+      record = lambda: {'price': '1.5', 'count': 2, 'tags': '[1, "2"]', 'meta': '{"at": "2018-01-31"}'}
+      res, errors = Parser.compile(TEMPLATE, errors='collect')(record())
+      self.assertEqual(errors, [])
+      self.assertEqual(res, Parser.compile(TEMPLATE)(record()))
+
+    def test_out_of_place(self):
+      record = {'price': 'abc', 'count': '3'}
+      res, errors = Parser.compile(TEMPLATE, inplace=False, errors='collect')(record)
+      self.assertEqual(record, {'price': 'abc', 'count': '3'})
+      self.assertEqual(res, {'price': 'abc', 'count': 3})
+      self.assertEqual(len(errors), 1)
+
+    def test_batch(self):
+      rows = [{'price': '1', 'count': 'x'}, '{"price": "2"}', {'price': 'y'}]
+      res, errors = Parser.batch({'price': float, 'count': int}, rows, errors='collect')
+      self.assertEqual(res, [{'price': 1.0, 'count': 'x'}, {'price': 2.0}, {'price': 'y'}])
+      self.assertEqual([e.path for e in errors], [(0, 'count'), (2, 'price')])
+      cols, errors = Parser.batch({'price': float}, [{'price': '1'}, {'price': 'z'}], columns=True, errors='collect')
+      self.assertEqual(cols, {'price': [1.0, 'z']})
+      self.assertRaises(ValueError, Parser.batch, {}, [], errors='ignore')
+      self.assertRaises(ValueError, Parser.compile, {}, errors='ignore')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+import copy
+from morphit import Processor, Parser, Instances
+from morphit import compiler
+from datetime import datetime, timezone
+
+class TestCompiler(unittest.TestCase):
+    def setUp(self):
+      self.template = {
+          'dict':dict,
+          'tojson':str,
+          'tupletojson': (str,),
+          'this':float,
+          'other':2.0,
+          'that': bool,
+          'when': Instances['datetime'],
+          'deep': {'a': [1.0], 'b': (9, 9)},
+      }
+
+    def assertSameAsParser(self, template, var):
+      expected = Parser(copy.deepcopy(template), copy.deepcopy(var))
+      compiled = Parser.compile(template)
+      self.assertEqual(compiled(copy.deepcopy(var)), expected)
+      # Second call takes the cached path
+      self.assertEqual(compiled(copy.deepcopy(var)), expected)
+
+    def test_compile_scalars(self):
+      self.assertSameAsParser(60, '150.0')
+      self.assertSameAsParser(float, '$10,000.00')
+      self.assertSameAsParser(bool, 't')
+      self.assertSameAsParser('', None)
+      self.assertSameAsParser(None, 100)
+      self.assertSameAsParser(Instances['datetime'], '2018-01-31T06:17:45.547')
+
+    def test_compile_sequences(self):
+      self.assertSameAsParser([], "[u'this',u'that']")
+      self.assertSameAsParser(['strings'], "['photo', 2, 'pic', 'pics']")
+      self.assertSameAsParser([], 'photo')
+      self.assertSameAsParser([2.0], (9, 9))
+      self.assertSameAsParser(([9.0, 9.0],), ([2.0,9],9))
+      self.assertSameAsParser([(9,9)], ([2.0, 9],))
+      self.assertSameAsParser((1.0,), 1000)
+
+    def test_compile_nested_dict(self):
+      record = {
+        'dict': {'check': 'yup'},
+        'tojson': {'check': 'yup'},
+        'tupletojson': [9, 9],
+        'this': '2.0',
+        'other': 'N/A',
+        'that': 'False',
+        'when': '1517408042',
+        'deep': {'a': 1000, 'b': ['2.0', '3']},
+      }
+      self.assertSameAsParser(self.template, record)
+      self.assertSameAsParser(self.template, "{u'this':u'2.0','other': '2', 'that':'t'}")
+
+    def test_compile_falls_back_when_input_type_changes(self):
+      compiled = Parser.compile({'a': 1.0})
+      self.assertEqual(compiled({'a': '2'}), {'a': 2.0})
+      self.assertEqual(compiled({'a': None}), {'a': 0.0})
+      self.assertEqual(compiled({'a': 3}), {'a': 3.0})
+      self.assertEqual(compiled('{"a": "4"}'), {'a': 4.0})
+
+    def test_compile_functions_and_processors(self):
+      child = Processor({'start': Instances['datetime']})
+      compiled = Parser.compile({
+        'deep': child,
+        'x10': lambda x: int(x)*10,
+        'orig': lambda partial, fallback: fallback,
+      })
+      res = compiled({'deep': {'start': 1576226168.818243}, 'x10': '1', 'orig': 1}, 'fb')
+      self.assertEqual(res['deep'], {'start': datetime(2019, 12, 13, 0, 36, 8, 818243)})
+      self.assertEqual(res['x10'], 10)
+      self.assertEqual(res['orig'], 'fb')
+
+    def test_compiled_as_base(self):
+      compiled = Parser.compile({'a': int})
+      self.assertEqual(Parser([compiled], [{'a': '1.0'}]), [{'a': 1}])
+      self.assertEqual(Processor(compiled)({'a': '2'}), {'a': 2})
+      self.assertEqual(compiled.template, {'a': int})
+
+    def test_compile_unsupported_raises_like_parser(self):
+      compiled = Parser.compile(2.0)
+      self.assertRaises(ValueError, compiled, 'MMMM')
+
+    def test_batch_dicts(self):
+      records = [
+        {'this': '2.0', 'that': 't', 'deep': {'a': 1000, 'b': ['2.0', '3']}},
+        {'this': 'N/A', 'other': '3', 'extra': 'kept'},
+        "{'this': '4', 'that': 'False'}",
+        {'this': 5, 'when': 1517408042},
+      ]
+      expected = [Parser(self.template, r) for r in copy.deepcopy(records)]
+      self.assertEqual(Parser.batch(self.template, copy.deepcopy(records)), expected)
+
+    def test_batch_columns(self):
+      records = [{'a': '1', 'b': 't'}, {'a': '2.5'}, {'b': '0', 'c': 'x'}]
+      res = Parser.batch({'a': float, 'b': bool}, records, columns=True)
+      self.assertEqual(res, {'a': [1.0, 2.5, None], 'b': [True, None, False]})
+
+    def test_batch_tuples(self):
+      template = (float, int, bool)
+      records = [('1', '2.0', 't', 'tail'), ['3', 4], ('5',), 6]
+      expected = [Parser(template, r) for r in records]
+      self.assertEqual(Parser.batch(template, iter(records)), expected)
+      cols = Parser.batch(template, records[:2], columns=True)
+      self.assertEqual(cols, [[1.0, 3.0], [2, 4], [True, None]])
+
+    def test_batch_single_type_template(self):
+      self.assertEqual(Parser.batch([float], [['1', 2], ('3',)]), [[1.0, 2.0], [3.0]])
+      self.assertEqual(Parser.batch(int, ['1.0', 2.0]), [1, 2])
+
+    def test_template_is_never_mutated(self):
+      template = {'a': 'N/A', 'b': {'c': 'N/A'}}
+      Parser(template, {'a': '1', 'b': {'c': '2'}})
+      Parser.compile(template)({'a': '1', 'b': {'c': '2'}})
+      self.assertEqual(template, {'a': 'N/A', 'b': {'c': 'N/A'}})
+
+    def test_out_of_place_shares_unchanged_subtrees(self):
+      compiled = Parser.compile({'a': float, 'deep': {'b': int}, 'same': {'c': float}, 'tags': [str]}, inplace=False)
+      shared = {'c': 1.5}
+      tags = ['x', 'y']
+      record = {'a': '1', 'deep': {'b': '2.0', 'other': [1]}, 'same': shared, 'tags': tags, 'raw': {'z': 1}}
+      before = copy.deepcopy(record)
+      res = compiled(record)
+      self.assertEqual(record, before)
+      self.assertEqual(res, {'a': 1.0, 'deep': {'b': 2, 'other': [1]}, 'same': {'c': 1.5}, 'tags': ['x', 'y'], 'raw': {'z': 1}})
+      self.assertIsNot(res, record)
+      self.assertIsNot(res['deep'], record['deep'])
+      self.assertIs(res['deep']['other'], record['deep']['other'])
+      self.assertIs(res['same'], shared)
+      self.assertIs(res['tags'], tags)
+      self.assertIs(res['raw'], record['raw'])
+      # Nothing to convert, nothing copied
+      clean = {'a': 1.0, 'same': shared}
+      self.assertIs(compiled(clean), clean)
+
+    def test_out_of_place_na(self):
+      record = {'a': 'N/A'}
+      self.assertEqual(Parser.compile({'a': float}, inplace=False)(record), {'a': 0.0})
+      self.assertEqual(record, {'a': 'N/A'})
+
+    def test_wide_template_shape_plans(self):
+      template = dict(('f%d' % i, float if i % 2 else int) for i in range(40))
+      template['f3'] = 'N/A'
+      records = [{'f1': '1.5', 'f2': '2'}, {'f2': '7', 'f1': '3'}, {'f3': 'N/A', 'x': 1}, {}]
+      for record in records:
+        self.assertSameAsParser(template, record)
+      convert = compiler.compileNode(template)
+      for record in records:
+        convert(dict(record), None)
+      self.assertEqual(len(convert.plan.plans), 4)
+      self.assertEqual([k for k, _ in convert.plan.plans[('f2', 'f1')]], ['f1', 'f2'])
+      record = {'f1': '1', 'f2': 'N/A'}
+      self.assertEqual(Parser.compile(template, inplace=False)(record), {'f1': 1.0, 'f2': 0})
+      self.assertEqual(record, {'f1': '1', 'f2': 'N/A'})
+
+    def test_shape_plan_eviction(self):
+      template = dict(('f%d' % i, int) for i in range(compiler.PLAN_MIN))
+      default, compiler.PLAN_CACHE = compiler.PLAN_CACHE, 3
+      try:
+        convert = compiler.compileNode(template)
+        for i in range(10):
+          self.assertEqual(convert({'f%d' % i: str(i)}, None), {'f%d' % i: i})
+        self.assertEqual(list(convert.plan.plans), [('f7',), ('f8',), ('f9',)])
+      finally:
+        compiler.PLAN_CACHE = default
+      # Records wider than the template are checked key by key, not planned
+      wide = dict([('x%d' % i, i) for i in range(compiler.PLAN_MIN + 1)], f0='5')
+      self.assertEqual(convert(wide, None)['f0'], 5)
+      self.assertEqual(len(convert.plan.plans), 3)
+      self.assertIsNone(compiler.compileNode({'a': int}).plan)
@@ -0,0 +1,59 @@
+import unittest
+import pickle
+from morphit import Parser, DateParser, Instances
+from datetime import datetime, timezone, date, timedelta
+
+class TestDates(unittest.TestCase):
+    def test_formats_match_parser(self):
+      p = DateParser()
+      self.assertEqual(p('1517408042.277897'), datetime(2018, 1, 31, 6, 14, 2, 277897))
+      self.assertEqual(p('1517408042'), datetime(2018, 1, 31, 6, 14, 2))
+      self.assertEqual(p('1517408265547'), datetime(2018, 1, 31, 6, 17, 45, 547000))
+      self.assertEqual(p('2018-01-31T06:17:45.547'), datetime(2018, 1, 31, 6, 17, 45, 547000, tzinfo=timezone.utc))
+      self.assertEqual(p('2018-01-31T06:17:45.547Z'), datetime(2018, 1, 31, 6, 17, 45, 547000, tzinfo=timezone.utc))
+      self.assertEqual(p('2018-01-31 06:17:45+05:30'), datetime(2018, 1, 31, 6, 17, 45, tzinfo=timezone(timedelta(hours=5, minutes=30))))
+      # Not covered by the fast path, handled by iso8601
+      self.assertEqual(p('2018-01-31T06:17:45,5'), datetime(2018, 1, 31, 6, 17, 45, 500000, tzinfo=timezone.utc))
+      self.assertEqual(p('20180131T061745Z'), datetime(2018, 1, 31, 6, 17, 45, tzinfo=timezone.utc))
+      self.assertRaises(Exception, p, 'MMMM')
+
+    def test_format_is_detected_once(self):
+      p = DateParser()
+      p('2018-01-31T06:17:45.547')
+      self.assertEqual(p.kind, 'iso')
+      p('2018-02-01T00:00:00')
+      self.assertEqual(p.kind, 'iso')
+      p('1517408042')
+      self.assertEqual(p.kind, 'int')
+
+    def test_date_target(self):
+      p = DateParser(date)
+      self.assertEqual(p('2018-01-31'), date(2018, 1, 31))
+      self.assertEqual(p('2018-01-31T23:17:45-05:00'), date(2018, 1, 31))
+      self.assertEqual(p('1517408042'), date(2018, 1, 31))
+      self.assertEqual(Parser(date(2018, 1, 31), '2018-02-01'), date(2018, 2, 1))
+
+    def test_cache_hit_rate(self):
+      p = DateParser(cache=2)
+      for var in ['2018-01-31', '2018-01-31', '2018-02-01', '2018-01-31']:
+        p(var)
+      info = p.cacheInfo()
+      self.assertEqual((info.hits, info.misses, info.currsize), (2, 2, 2))
+      self.assertEqual(info.hitrate, 0.5)
+      p.cacheClear()
+      self.assertEqual(p.cacheInfo().currsize, 0)
+      self.assertEqual(DateParser().cacheInfo().hitrate, 0.0)
+
+    def test_date_parser_as_template_field(self):
+      template = {'when': DateParser(cache=16), 'day': DateParser(date)}
+      record = {'when': '1517408042', 'day': '2018-01-31'}
+      res = Parser(template, dict(record))
+      self.assertEqual(res, {'when': datetime(2018, 1, 31, 6, 14, 2), 'day': date(2018, 1, 31)})
+      self.assertEqual(Parser.compile(template)(dict(record)), res)
+      self.assertEqual(Parser(DateParser(), 1517408042.0), datetime(2018, 1, 31, 6, 14, 2))
+      self.assertEqual(template['when'].cacheInfo().hits, 1)
+
+    def test_pickle(self):
+      p = pickle.loads(pickle.dumps(DateParser(date, cache=8)))
+      self.assertEqual((p.target, p.maxsize), (date, 8))
+      self.assertEqual(p('2018-01-31'), date(2018, 1, 31))
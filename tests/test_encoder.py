@@ -0,0 +1,49 @@
+import json
+import unittest
+from datetime import datetime, date
+from decimal import Decimal
+from morphit import JSONEncoder, DateParser
+
+class Stamp(datetime):
+  pass
+
+class TestEncoder(unittest.TestCase):
+    def test_default_types(self):
+      d = {'t': datetime(2018, 1, 31, 6, 17, 45, 547000), 'd': date(2018, 1, 31)}
+      self.assertEqual(json.dumps(d, cls=JSONEncoder),
+        '{"t": "2018-01-31T06:17:45.547", "d": "2018-01-31"}')
+
+    def test_subclass_resolves_through_mro(self):
+      self.assertEqual(json.dumps(Stamp(2018, 1, 31), cls=JSONEncoder), '"2018-01-31T00:00:00"')
+      self.assertIs(JSONEncoder.resolved[Stamp], JSONEncoder.handlers[datetime])
+
+    def test_callable_without_code(self):
+      self.assertEqual(json.dumps(len, cls=JSONEncoder), 'null')
+
+    def test_register_clears_resolved(self):
+      JSONEncoder.resolve(Decimal)
+      self.assertIn(Decimal, JSONEncoder.resolved)
+      JSONEncoder.register(Decimal, str)
+      try:
+        self.assertNotIn(Decimal, JSONEncoder.resolved)
+        self.assertEqual(json.dumps(Decimal('1.50'), cls=JSONEncoder), '"1.50"')
+      finally:
+        del JSONEncoder.handlers[Decimal]
+        JSONEncoder.resolved.clear()
+
+    def test_compiled_matches_encoder(self):
+      template = {'at': DateParser(), 'tags': [str], 'items': [{'on': date}]}
+      records = [
+        {'at': datetime(2018, 1, 31, 6, 17, 45, 547000), 'tags': ['a'],
+         'items': [{'on': date(2018, 2, 1)}, {'on': None}], 'extra': date(2018, 1, 1)},
+        {'at': None, 'tags': [], 'items': []},
+      ]
+      encode = JSONEncoder.compile(template, sort_keys=True)
+      for r in records:
+        before = dict(r)
+        self.assertEqual(encode(r), json.dumps(r, cls=JSONEncoder, sort_keys=True))
+        self.assertEqual(r, before)
+        self.assertIsInstance(r['items'], list)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import subprocess
+import unittest
+from multipledispatch.conflict import ambiguities
+from morphit import Parser
+
+# Self time budget for morphit's own modules, generous enough for cold
+# bytecode compiles on slow machines
+BUDGET_US = 60000
+
+# Only imported once something needs them
+DEFERRED = ['iso8601', 'morphit.metrics', 'morphit.compiler', 'morphit.encoder',
+            'morphit.parallel', 'morphit.stream', 'morphit.aio', 'morphit.vectorized', 'morphit.frozen', 'morphit.lazy', 'numpy', 'decimal']
+
+def importTimes():
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import morphit'],
+                        cwd=root, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+  times = {}
+  for line in proc.stderr.splitlines():
+    if not line.startswith('import time:') or 'self [us]' in line:
+      continue
+    own, cumulative, name = line[len('import time:'):].split('|')
+    times[name.strip()] = (int(own), int(cumulative))
+  return times
+
+class TestImports(unittest.TestCase):
+    def test_import_budget(self):
+      times = importTimes()
+      self.assertIn('morphit.utils', times)
+      for name in DEFERRED:
+        self.assertNotIn(name, times)
+      own = sum(t[0] for name, t in times.items() if name.split('.')[0] == 'morphit')
+      self.assertLess(own, BUDGET_US)
+
+    def test_builtin_overloads_unambiguous(self):
+      # ParserDispatcher.reorder skips this scan for morphit's own overloads
+      self.assertEqual(ambiguities(Parser.funcs), set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import copy
+import unittest
+from datetime import datetime, date
+from morphit import Parser, Processor
+
+SAMPLES = [
+  {'id': '1001', 'price': '12.5', 'qty': '3', 'active': 't', 'flag': '1',
+   'created_at': '1517408265547', 'updatedAt': 1517408265, 'count': 1517408265,
+   'day': '2018-01-31', 'meta': '{"source": "1", "score": "0.5"}', 'tags': "['a', 'b']",
+   'nested': {'n': '1', 'xs': ['1', '2.5']}, 'note': 'hello', 'mixed': 'a', 'empty': None},
+  {'id': '1002', 'price': '13', 'qty': '', 'active': 'f', 'flag': '0',
+   'created_at': '1517408265999', 'updatedAt': 1517408300, 'count': 3,
+   'day': '2018-02-01', 'meta': {'source': 2, 'score': 1}, 'tags': [],
+   'nested': {'n': 2, 'xs': []}, 'note': 'x', 'mixed': {'a': 1}, 'empty': None},
+]
+
+class TestInfer(unittest.TestCase):
+    def test_infer(self):
+      template = Processor.infer(SAMPLES)
+      self.assertEqual(template, {
+        'id': int, 'price': float, 'qty': int, 'active': bool, 'flag': int,
+        'created_at': datetime, 'updatedAt': datetime, 'count': int, 'day': date,
+        'meta': {'source': int, 'score': float}, 'tags': [str],
+        'nested': {'n': int, 'xs': [float]}, 'note': str, 'mixed': None, 'empty': None,
+      })
+
+    def test_usable_with_parser(self):
+      template = Processor.infer(SAMPLES)
+      res = Parser(template, copy.deepcopy(SAMPLES[0]))
+      self.assertEqual(res['created_at'], datetime(2018, 1, 31, 6, 17, 45, 547000))
+      self.assertEqual(res['meta'], {'source': 1, 'score': 0.5})
+      self.assertEqual(res['tags'], ['a', 'b'])
+      self.assertIs(res['active'], True)
+      res = Processor(template)(copy.deepcopy(SAMPLES[1]))
+      self.assertEqual(res['nested'], {'n': 2, 'xs': []})
+      self.assertEqual(res['mixed'], {'a': 1})
+
+    def test_bool_rules(self):
+      # 'true' isn't read as True by Parser(bool, ...), so it stays a string
+      self.assertEqual(Processor.infer([{'a': 'true'}, {'a': 'false'}]), {'a': str})
+      self.assertEqual(Processor.infer([{'a': '1'}, {'a': 'True'}]), {'a': bool})
+      self.assertEqual(Processor.infer([{'a': '1'}, {'a': '2'}]), {'a': int})
+
+    def test_parenthesized_strings_stay_strings(self):
+      # Parser doesn't load '(1, 2)' as a list, a [int] template would mangle it
+      template = Processor.infer([{'b': '(1, 2)', 'c': '[1, 2]'}])
+      self.assertEqual(template, {'b': str, 'c': [int]})
+      self.assertEqual(Parser(template, {'b': '(1, 2)', 'c': '[1, 2]'}), {'b': '(1, 2)', 'c': [1, 2]})
+
+    def test_max_samples_and_repr(self):
+      records = iter([{'a': '1', 'b': {'c': '2018-01-31T06:17:45'}}, {'a': 'x'}])
+      template = Processor.infer(records, max_samples=1)
+      self.assertEqual(template, {'a': int, 'b': {'c': datetime}})
+      self.assertEqual(repr(template), "{\n    'a': int,\n    'b': {\n        'c': datetime,\n    },\n}")
+      self.assertEqual(Processor.infer([['1', '2']]), [int])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import copy
+import json
+import unittest
+from datetime import datetime
+from collections import OrderedDict
+from collections.abc import Mapping
+from morphit import Parser, JSONEncoder
+
+TEMPLATE = {
+  'id': int,
+  'price': float,
+  'tags': [int],
+  'meta': {'at': datetime, 'n': 'N/A'},
+  'pos': [int, float],
+  'pair': (str,),
+}
+
+RECORD = {
+  'id': '1',
+  'price': '$2.5',
+  'tags': '[1, "2"]',
+  'meta': '{"at": 1517408265, "n": "3"}',
+  'pos': ['1', '2', 'x'],
+  'pair': [1],
+  'other': 'N/A',
+}
+
+class TestLazy(unittest.TestCase):
+    def setUp(self):
+      self.convert = Parser.compile(TEMPLATE, lazy=True)
+      self.expected = Parser.compile(TEMPLATE, inplace=False)(copy.deepcopy(RECORD))
+
+    def test_fields_convert_on_first_read(self):
+      raw = copy.deepcopy(RECORD)
+      r = self.convert(raw)
+      self.assertIsInstance(r, Mapping)
+      self.assertEqual(len(r.cache), 0)
+      self.assertEqual(r['id'], 1)
+      self.assertEqual(r.cache, {'id': 1})
+      self.assertEqual(r['meta']['at'], datetime.fromtimestamp(1517408265))
+      self.assertEqual(r['tags'][-1], 2)
+      self.assertEqual(r['pos'][:], [1, 2.0, 'x'])
+      self.assertEqual(r['pair'], ('1',))
+      self.assertEqual(r['other'], 'N/A')
+      self.assertIs(r['meta'], r['meta'])
+      self.assertEqual(raw, RECORD)
+
+    def test_materialize(self):
+      r = self.convert(copy.deepcopy(RECORD))
+      r['price']
+      res = r.materialize()
+      self.assertIs(type(res), dict)
+      self.assertIs(type(res['meta']), dict)
+      self.assertIs(type(res['tags']), list)
+      self.assertEqual(res, self.expected)
+      self.assertEqual(self.convert(copy.deepcopy(RECORD)), self.expected)
+      self.assertEqual(json.loads(json.dumps(r, cls=JSONEncoder))['tags'], [1, 2])
+
+    def test_mapping_behaviour(self):
+      r = self.convert({'id': '3', 'extra': 1})
+      self.assertIn('extra', r)
+      self.assertNotIn('price', r)
+      self.assertEqual(list(r), ['id', 'extra'])
+      self.assertEqual(r.get('price', 0), 0)
+      with self.assertRaises(KeyError):
+        r['price']
+      self.assertIsNone(self.convert(None))
+      self.assertEqual(repr(r), '<LazyRecord 2 keys, 0 converted>')
+
+    def test_template_subclasses(self):
+      from morphit import Processor
+      from morphit.lazy import LazyRecord, LazyList
+      for template in [Processor.infer([{'id': '1', 'tags': ['2']}]), OrderedDict([('id', int), ('tags', [int])])]:
+        r = Parser.compile(template, lazy=True)({'id': '3', 'tags': ['4']})
+        self.assertIsInstance(r, LazyRecord)
+        self.assertIsInstance(r['tags'], LazyList)
+        self.assertEqual(r.materialize(), {'id': 3, 'tags': [4]})
+
+    def test_errors_raise_on_read(self):
+      r = self.convert({'id': 'abc', 'price': '1'})
+      self.assertEqual(r['price'], 1.0)
+      with self.assertRaises(ValueError):
+        r['id']
+      with self.assertRaises(ValueError):
+        Parser.compile(TEMPLATE, lazy=True, errors='collect')
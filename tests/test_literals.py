@@ -0,0 +1,40 @@
+import unittest
+import math
+from morphit import Parser
+from morphit.literals import loads, scan
+
+class TestLiterals(unittest.TestCase):
+    def test_json(self):
+      self.assertEqual(loads('{"a": [1, 2.5, "x"], "b": null}'), {'a': [1, 2.5, 'x'], 'b': None})
+
+    def test_python_and_unicode(self):
+      self.assertEqual(loads("['photo', 2, 'pic']"), ['photo', 2, 'pic'])
+      self.assertEqual(loads("[u'this',u'that']"), ['this', 'that'])
+      # A trailing u inside a string is not a prefix
+      self.assertEqual(loads("[u'menu', 'tau u', u'x']"), ['menu', 'tau u', 'x'])
+      self.assertEqual(loads("{'a': True, 'b': None, 'c': (1, 2), 'd': [1,],}"), {'a': True, 'b': None, 'c': [1, 2], 'd': [1]})
+
+    def test_embedded_apostrophes(self):
+      self.assertEqual(loads('["it\'s", u\'x\']'), ["it's", 'x'])
+      self.assertEqual(loads('{"quote": "it\'s", \'other\': \'say "hi"\'}'), {'quote': "it's", 'other': 'say "hi"'})
+      self.assertEqual(loads("['it\\'s \\u00e9\\n']"), ["it's é\n"])
+      self.assertEqual(Parser({}, '{"a": "it\'s"}'), {'a': "it's"})
+      self.assertEqual(Parser([], "[\"don't\", u'stop']"), ["don't", 'stop'])
+
+    def test_scan_matches_json(self):
+      text = '{"a": [1, -2, 3.5e2, true, false, null], "b": {"c": "d\\"e"}, "f": -Infinity}'
+      self.assertEqual(scan(text), loads(text))
+      self.assertTrue(math.isnan(scan('[NaN]')[0]))
+
+    def test_malformed(self):
+      for text in ["['a'", "['a'] x", "['a')", "{'a': 1]", "", "-"]:
+        self.assertRaises(ValueError, loads, text)
+
+    def test_malformed_separators(self):
+      # Dangling keys, missing or extra separators and unhashable keys
+      for text in ["{'a': 1, 'b'}", "{'a':}", "[1 2 3]", "{'a' 'b' 'c' 'd'}",
+                   "['a',,,'b']", "{[1]: 2}", "[1: 2]", "{'a': 1 'b': 2}",
+                   "[, 1]", "{'a':: 1}", "[1 [2]]", "{'a', 'b'}"]:
+        self.assertRaises(ValueError, loads, text)
+      for text in ["{'a': 1, 'b'}", "{'a':}", "{'a' 'b' 'c' 'd'}", "{[1]: 2}"]:
+        self.assertRaises(ValueError, Parser, {}, text)
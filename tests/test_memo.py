@@ -0,0 +1,72 @@
+import pickle
+import unittest
+from datetime import datetime
+from collections import OrderedDict
+from morphit import Parser, Processor, Memo, NumberFormats
+from morphit.memo import usesFallback
+
+class TestMemo(unittest.TestCase):
+    def test_field_memo(self):
+      active = Memo(bool, size=2)
+      convert = Parser.compile({'active': active, 'price': Memo(NumberFormats['us'])})
+      res = [convert({'active': v, 'price': '$1,200'}) for v in ('t', 'f', 't', 't')]
+      self.assertEqual([r['active'] for r in res], [True, False, True, True])
+      self.assertEqual(res[0]['price'], 1200.0)
+      info = active.cacheInfo()
+      self.assertEqual((info.hits, info.misses, info.currsize, info.hitrate), (2, 2, 2, 0.5))
+
+    def test_lru_eviction(self):
+      memo = Memo(int, size=2)
+      for v in ('1', '2', '3', '1'):
+        memo(v)
+      self.assertEqual(memo.cacheInfo().hits, 0)
+      memo('1')
+      self.assertEqual(memo.cacheInfo()[:2], (1, 4))
+      memo.cacheClear()
+      self.assertEqual(memo.cacheInfo().currsize, 0)
+
+    def test_mutable_and_unhashable_skip_the_cache(self):
+      wrap = Memo(lambda x: [x])
+      self.assertIsNot(wrap('x'), wrap('x'))
+      self.assertEqual(wrap.cacheInfo().currsize, 0)
+      self.assertEqual(Memo(list)([1, 2]), [1, 2])
+      self.assertEqual(Parser({'n': Memo(int)}, {'n': None}), {'n': 0})
+      typed = Memo(str)
+      self.assertEqual([typed(1), typed(1.0), typed(True)], ['1', '1.0', 'True'])
+
+    def test_processor_step_and_pickle(self):
+      calls = []
+      def double(x):
+        calls.append(x)
+        return x * 2
+      p = Processor(Memo(double)).then(str)
+      self.assertEqual([p(3), p(3), p(4)], ['6', '6', '8'])
+      self.assertEqual(calls, [3, 4])
+      memo = pickle.loads(pickle.dumps(Memo(datetime, size=8)))
+      self.assertEqual(repr(memo), "Memo(<class 'datetime.datetime'>, size=8)")
+      self.assertEqual(memo('2018-01-31T06:17:45Z').year, 2018)
+      self.assertRaises(ValueError, Memo, int, 0)
+
+    def test_fallback_dependent_bases(self):
+      # Keyed on var alone, a cached result would ignore a different fallback
+      pick = Memo(lambda var, fallback: fallback if var == '' else var)
+      self.assertEqual([pick('', 'a'), pick('', 'b'), pick('x', 'c')], ['a', 'b', 'x'])
+      self.assertEqual(pick(''), None)
+      self.assertEqual(pick.cacheInfo().misses, 1)
+      nested = Memo({'a': lambda var, fallback: fallback})
+      self.assertEqual(nested({'a': 1}, 2), {'a': 2})
+      inferred = Processor.infer([{'a': 'x'}])
+      inferred['a'] = lambda var, fallback: fallback
+      self.assertEqual(Memo(inferred)('{"a": 1}', 3), {'a': 3})
+      self.assertTrue(usesFallback(inferred))
+      self.assertTrue(usesFallback(OrderedDict(a=[lambda var, fallback: var])))
+      # One argument bases still hit the cache inside a Processor
+      p = Processor(Memo(int)).then(lambda v, original: (v, original))
+      self.assertEqual([p('1'), p('1')], [(1, '1'), (1, '1')])
+      self.assertEqual(p.templates[0].cacheInfo().hits, 1)
+
+    def test_decimal(self):
+      from decimal import Decimal
+      memo = Memo(lambda v: Decimal(v))
+      self.assertEqual([memo('1.5'), memo('1.5')], [Decimal('1.5')] * 2)
+      self.assertEqual(memo.cacheInfo().hits, 1)
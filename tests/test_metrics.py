@@ -0,0 +1,65 @@
+import unittest
+from morphit import Parser, Processor, stats
+from morphit.metrics import Timing, bucket, bucketTop
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+      stats.reset()
+      stats.enable()
+
+    def tearDown(self):
+      stats.disable()
+      stats.reset()
+
+    def test_dispatch_counts(self):
+      Parser({'a': float, 'b': [int]}, {'a': '1.5', 'b': ['1', '2']})
+      self.assertRaises(ValueError, Parser, 1.0, 'abc')
+      snap = stats()['dispatch']
+      self.assertEqual(snap['dict', 'dict']['count'], 1)
+      self.assertEqual(snap['int', 'str']['count'], 2)
+      self.assertEqual(snap['float', 'str']['count'], 2)
+      self.assertEqual(snap['float', 'str']['errors'], 1)
+      # Parser(float, x) forwards to the float overload, counted once
+      Parser(float, '2')
+      self.assertEqual(stats()['dispatch']['float', 'str']['count'], 3)
+      self.assertNotIn(('type', 'str'), stats()['dispatch'])
+
+    def test_steps(self):
+      def double(x): return x * 2
+      p = Processor(float).then(double)
+      for _ in range(3):
+        p('1.5')
+      steps = stats()['steps']
+      self.assertEqual(steps['float | %s [1]'%double.__qualname__]['count'], 3)
+      self.assertEqual(steps['float | %s [0]'%double.__qualname__]['count'], 3)
+
+    def test_disable_restores_overloads(self):
+      timed = Parser.dispatch(dict, dict, object)
+      self.assertTrue(hasattr(timed, 'untimed'))
+      stats.disable()
+      self.assertIs(Parser.dispatch(dict, dict, object), timed.untimed)
+      Parser(1, '2')
+      self.assertEqual(stats()['dispatch'], {})
+
+    def test_out_of_place_while_enabled(self):
+      record = {'a': '1', 'b': {'c': '2'}}
+      res = Parser.compile({'a': int, 'b': {'c': float}}, inplace=False)(record)
+      self.assertEqual(res, {'a': 1, 'b': {'c': 2.0}})
+      self.assertEqual(record, {'a': '1', 'b': {'c': '2'}})
+
+    def test_percentiles(self):
+      for ns in [5, 100, 1000, 1500, 20000]:
+        self.assertLessEqual(ns, bucketTop(bucket(ns)))
+        self.assertLess(bucketTop(bucket(ns)), ns * 1.25 + 8)
+      t = Timing()
+      for ns in range(1, 1001):
+        t.add(ns * 1000)
+      summary = t.summary()
+      self.assertEqual(summary['count'], 1000)
+      self.assertLessEqual(summary['p50'], summary['p90'])
+      self.assertLessEqual(summary['p90'], summary['p99'])
+      self.assertLessEqual(summary['p99'], summary['max'])
+      self.assertAlmostEqual(summary['p50'], 500e-6, delta=100e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from morphit import Parser, NumberFormat, NumberFormats
+
+class TestNumeric(unittest.TestCase):
+    def test_default_matches_legacy_rules(self):
+      p = NumberFormats['default']
+      self.assertEqual(p('150.0'), 150.0)
+      self.assertEqual(p('-.5'), -0.5)
+      self.assertEqual(p(''), 0.0)
+      self.assertEqual(p(' 1 000 '), 1000.0)
+      self.assertEqual(p('$10,000.00'), 10000.0)
+      self.assertEqual(p('1.234.567'), 1234567.0)
+      self.assertEqual(p.parse('150.0', int), 150)
+      self.assertRaises(ValueError, p, 'MMMM')
+      self.assertRaises(ValueError, p, '1-2')
+
+    def test_error_message(self):
+      with self.assertRaises(ValueError) as ctx:
+        Parser(2.0, '$')
+      self.assertEqual(str(ctx.exception), "Unable to cast  -> <class 'float'>")
+
+    def test_profiles(self):
+      eu = NumberFormats['eu']
+      self.assertEqual(eu('1.234,56 €'), 1234.56)
+      self.assertEqual(eu('1,5'), 1.5)
+      self.assertEqual(NumberFormats['ch']("CHF 1'250.50"), 1250.5)
+      self.assertEqual(NumberFormats['us']('$1,200'), 1200.0)
+      strict = NumberFormat(int, thousands=',', currency='$', strict=True)
+      self.assertEqual(strict('$1,200'), 1200)
+      self.assertRaises(ValueError, strict, '1,200 USD')
+
+    def test_profile_as_template_field(self):
+      template = {'price': NumberFormat(decimal=',', thousands='.'), 'count': NumberFormat(int)}
+      record = {'price': '1.000,5', 'count': 3.9}
+      self.assertEqual(Parser(template, dict(record)), {'price': 1000.5, 'count': 3})
+      self.assertEqual(Parser.compile(template)(dict(record)), {'price': 1000.5, 'count': 3})
+      self.assertEqual(repr(NumberFormat(int, strict=True)), "NumberFormat(int, decimal='.', thousands='', currency='', strict=True)")
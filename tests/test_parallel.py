@@ -0,0 +1,62 @@
+import unittest
+from morphit import Processor, Parser, Instances
+from morphit import parallel
+from datetime import datetime
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+      self.processor = Processor({
+        'id': int,
+        'x10': lambda x: int(x)*10,
+        'deep': Processor({'start': Instances['datetime']}),
+      })
+      self.records = [{'id': str(i), 'x10': i, 'deep': {'start': 1576226168.818243}} for i in range(100)]
+
+    def test_processor_map_keeps_order(self):
+      res = self.processor.map(self.records, workers=2, chunksize=7)
+      self.assertEqual([r['id'] for r in res], list(range(100)))
+      self.assertEqual(res[5]['x10'], 50)
+      self.assertEqual(res[5]['deep']['start'], datetime(2019, 12, 13, 0, 36, 8, 818243))
+
+    def test_processor_map_iterator_and_single_worker(self):
+      res = self.processor.map(iter(self.records[:10]), workers=2)
+      self.assertEqual([r['x10'] for r in res], [i * 10 for i in range(10)])
+      res = self.processor.map(self.records[:10], workers=1)
+      self.assertEqual([r['id'] for r in res], list(range(10)))
+
+    def test_parser_map(self):
+      res = Parser.map([float], [['1', 2], ('3',)], workers=2)
+      self.assertEqual(res, [[1.0, 2.0], [3.0]])
+
+    def test_start_methods(self):
+      import multiprocessing
+      records = [['1'], [2], ['3.5']]
+      for context in ['spawn', multiprocessing.get_context('spawn')]:
+        self.assertEqual(Processor([float]).map(records, workers=2, context=context), [[1.0], [2.0], [3.5]])
+      if 'fork' in multiprocessing.get_all_start_methods():
+        self.assertEqual(Parser.map({'x10': lambda x: int(x)*10}, [{'x10': '2'}], workers=2, context='fork'), [{'x10': 20}])
+      self.assertRaises(ValueError, Parser.map, [float], records, workers=2, executor='thread', context='spawn')
+
+    def test_parser_map_spawn_without_cloudpickle(self):
+      import pickle
+      payload, loads = parallel.dumps(parallel.Compiled({'a': float}))
+      self.assertIs(loads, pickle.loads)
+      self.assertEqual(loads(payload)({'a': '1.5'}), {'a': 1.5})
+      res = Parser.map({'a': float}, [{'a': '1'}, {'a': 2}], workers=2, context='spawn')
+      self.assertEqual(res, [{'a': 1.0}, {'a': 2.0}])
+
+    def test_pickled_worker(self):
+      # The path taken where fork isn't available
+      payload, loads = parallel.dumps(Processor([float]))
+      parallel.initWorker(payload, loads)
+      self.assertEqual(parallel.runChunk([['1'], [2]]), [[1.0], [2.0]])
+
+    def test_unpicklable_template(self):
+      try:
+        import cloudpickle
+      except ImportError:
+        self.assertRaises(TypeError, parallel.dumps, self.processor)
+        return
+      payload, loads = parallel.dumps(self.processor)
+      parallel.initWorker(payload, loads)
+      self.assertEqual(parallel.runChunk(self.records[1:2])[0]['x10'], 10)
@@ -292,3 +292,41 @@ class TestParser(unittest.TestCase):
       res = Parser(tmp, test)
       self.assertEqual(res['a'], [1000.0])
       self.assertEqual(res['b'], (1000.0))
+
+    '''
+    Type bases
+    '''
+
+    def test_type_base_table(self):
+      from morphit.utils import TypeTable
+      self.assertEqual(Parser(float, '2'), 2.0)
+      self.assertEqual(Parser(float, '3', None), 3.0)
+      proto, impl = TypeTable[float, str]
+      self.assertEqual(proto, 0.0)
+      self.assertEqual(Parser(dict, '{"a": 1}'), {'a': 1})
+      self.assertEqual(Parser(dict, '{"b": 2}'), {'b': 2})
+      self.assertEqual(TypeTable[dict, str][0], {})
+
+    def test_datetime_type_base(self):
+      self.assertEqual(Parser(datetime, 1575693119.329921), datetime(2019, 12, 6, 20, 31, 59, 329921))
+      self.assertEqual(Parser(date, '2018-01-31'), date(2018, 1, 31))
+
+    def test_register_clears_resolved(self):
+      from morphit.utils import Resolved
+      class Celsius(float): pass
+      self.assertEqual(Parser(Celsius(0), '1'), 1.0)
+      self.assertIn((Celsius, str), Resolved)
+      Parser.add((Celsius, str, object), lambda base, var, fallback: Celsius(float(var) - 273.15))
+      self.assertNotIn((Celsius, str), Resolved)
+      self.assertAlmostEqual(Parser(Celsius(0), '273.15'), 0.0)
+
+    def test_global_dispatch_extends_parser(self):
+      import multipledispatch
+      class Money(float): pass
+      @multipledispatch.dispatch(Money, str, object)
+      def Parser(base, var, fallback):
+        return Money(var.strip('$'))
+      from morphit import Parser as MorphitParser
+      self.assertIs(Parser, MorphitParser)
+      self.assertEqual(MorphitParser({'cost': Money(0)}, {'cost': '$5'}), {'cost': 5.0})
+      self.assertEqual(MorphitParser.compile([Money(0)])(['$1']), [1.0])
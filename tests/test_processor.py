@@ -1,5 +1,7 @@
+import pickle
 import unittest
-from morphit import Processor, Parser, Instances, Aggregators
+import tracemalloc
+from morphit import Processor, Parser, Instances, Aggregators, Aggregator
 from datetime import datetime, timezone, time
 
 class TestProcessor(unittest.TestCase):
@@ -97,6 +99,13 @@ class TestProcessor(unittest.TestCase):
         proc = Processor(lambda p, options={}: {'result':[1,2,3]}, aggregator=getLastResult)
         self.assertEqual(proc(None), [1,2,3])
 
+    def test_registered_function_aggs(self):
+        Aggregators['first'] = lambda res: res[1]
+        try:
+          self.assertEqual(Processor.flow([float, int], aggregator='first')('1.5'), 1.5)
+        finally:
+          del Aggregators['first']
+
 
     def test_processor_chain_lambda_original_value(self):
         partA = lambda partial, options={}: {'total': sum(partial)}
@@ -116,3 +125,113 @@ class TestProcessor(unittest.TestCase):
         self.assertEqual(exp, resultReduceMerge)
         self.assertEqual(exp, resultMerge)
         self.assertEqual(resultReduceMerge, resultMerge)
+
+    def test_processor_out_of_place(self):
+        p = Processor({'start': Instances['datetime'], 'n': int}, inplace=False)
+        record = {'start': 1576226168.818243, 'n': '1', 'keep': [1]}
+        result = p(record)
+        self.assertEqual(record, {'start': 1576226168.818243, 'n': '1', 'keep': [1]})
+        self.assertEqual(result['start'], datetime(2019, 12, 13, 0, 36, 8, 818243))
+        self.assertEqual(result['n'], 1)
+        self.assertIs(result['keep'], record['keep'])
+        p.then(lambda d: d['n'] * 10)
+        self.assertEqual(p(record), 10)
+        # Nested in place Processors convert copies too
+        inner = Processor({'a': int})
+        for outer in [Processor({'deep': inner}, inplace=False), Processor(inner, inplace=False),
+                      Processor({'deep': inner}, inplace=False).freeze()]:
+          record = {'deep': {'a': '1', 'b': [2]}, 'a': '3'}
+          result = outer(record)
+          self.assertEqual(record, {'deep': {'a': '1', 'b': [2]}, 'a': '3'})
+          self.assertIsNot(result, record)
+        self.assertEqual(result, {'deep': {'a': 1, 'b': [2]}, 'a': '3'})
+        self.assertEqual(Processor(inner, inplace=False)({'a': '3'}), {'a': 3})
+        self.assertEqual(inner.inplace, True)
+
+    def test_incremental_aggregator(self):
+        class Count(Aggregator):
+          def start(self, var): return 0
+          def step(self, state, value): return state + 1
+          def finish(self, state): return state
+        p = Processor.flow([float, int, str], aggregator=Count())
+        self.assertEqual(p('1.0'), 3)
+        self.assertEqual(Processor.flow([float, int], aggregator='map')('1.5'), [1.5, 1])
+
+    def peak(self, proc, var):
+        tracemalloc.start()
+        try:
+          proc(var)
+          return tracemalloc.get_traced_memory()[1]
+        finally:
+          tracemalloc.stop()
+
+    def test_reduce_long_chain_memory(self):
+        data = list(range(20000))
+        copy = lambda partial, options={}: [x + 1 for x in partial]
+        single = self.peak(Processor(copy), data)
+        reduce = Processor.flow([copy] * 50)
+        collect = Processor.flow([copy] * 50, aggregator='map')
+        # reduce holds at most the current and the next output
+        self.assertLess(self.peak(reduce, data), single * 3)
+        self.assertGreater(self.peak(collect, data), single * 25)
+
+    def test_optimize_flattens_nested_chains(self):
+        p = Processor.flow([float, None, lambda x: x, Processor.flow([int, lambda v: v * 2])])
+        self.assertEqual(p('1.5'), 2)
+        # float, int fused, identities dropped, the doubling lambda left
+        self.assertEqual(len(p.optimize()), 2)
+        m = Processor.flow([float, Processor.flow([int, str])], aggregator='map')
+        self.assertEqual(m('1.5'), [1.5, '1'])
+        self.assertEqual(len(m.optimize()), 2)
+
+    def test_optimize_invalidated_by_then(self):
+        inner = Processor(float)
+        outer = Processor(inner).then(lambda x: x + 1)
+        self.assertEqual(outer('1'), 2.0)
+        inner.then(int)
+        self.assertEqual(outer('1.5'), 2)
+        outer.then(str)
+        self.assertEqual(outer('1.5'), '2')
+        # Through two levels of inlining
+        deep = Processor(float)
+        top = Processor(Processor(deep)).then(lambda x: x * 2)
+        self.assertEqual(top('1.5'), 3.0)
+        deep.then(int)
+        self.assertEqual(top('1.5'), 2)
+
+    def test_then_only_invalidates_its_processor(self):
+        other = Processor(float).then(int)
+        other('1')
+        plan = other.plan
+        Processor(str).then(str)
+        other('2')
+        self.assertIs(other.plan, plan)
+
+    def test_then_invalidates_dependents(self):
+        # Out of place views share the templates of the Processor they copy
+        inner = Processor({'a': int})
+        outer = Processor({'deep': inner}, inplace=False)
+        self.assertEqual(outer({'deep': {'a': '1'}}), {'deep': {'a': 1}})
+        inner.then(lambda d: d['a'] + 1)
+        self.assertEqual(outer({'deep': {'a': '1'}}), {'deep': 2})
+        # An async step nested in a template makes every enclosing Processor async
+        async def later(var):
+          return var
+        wrapped = Processor({'x': Processor(inner)})
+        wrapped({'x': {'a': '1'}})
+        inner.then(later)
+        self.assertRaises(TypeError, wrapped, {'x': {'a': '1'}})
+
+    def test_pickle_after_call(self):
+        p = Processor({'a': float}).then(Processor({'a': int}))
+        self.assertEqual(p({'a': '1'}), {'a': 1})
+        self.assertIsNotNone(p.plan)
+        copy = pickle.loads(pickle.dumps(p))
+        self.assertEqual(copy({'a': '2.5'}), {'a': 2})
+
+    def test_optimize_without_curry(self):
+        # Nested processors see their own input as options when there's no fallback
+        inner = Processor(lambda partial, options={}: options)
+        p = Processor(lambda partial, options={}: 5).then(inner)
+        self.assertEqual(p(None), 5)
+        self.assertEqual(p(1), 1)
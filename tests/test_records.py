@@ -0,0 +1,59 @@
+import json
+import pickle
+import unittest
+from datetime import datetime
+from morphit import Parser, Processor, Record, JSONEncoder
+
+Row = Parser.record({'id': int, 'price': float, 'tags': [str], 'at': datetime}, 'Row')
+Pair = Parser.record({'id': int, 'price': float}, 'Pair', kind='tuple')
+Outer = Parser.record({'name': str, 'row': Row}, 'Outer')
+
+RECORD = {'id': '3', 'price': '1.5', 'tags': [1, 2], 'at': 1517408265547}
+
+class TestRecords(unittest.TestCase):
+    def test_slots_record(self):
+      r = Parser(Row, dict(RECORD))
+      self.assertIsInstance(r, Record)
+      self.assertFalse(hasattr(r, '__dict__'))
+      self.assertEqual((r.id, r.price, r.tags), (3, 1.5, ['1', '2']))
+      self.assertEqual(r.at, datetime(2018, 1, 31, 6, 17, 45, 547000))
+      self.assertEqual(list(r._asdict()), ['id', 'price', 'tags', 'at'])
+      self.assertEqual(r, Row(3, 1.5, ['1', '2'], r.at))
+
+    def test_tuple_record(self):
+      r = Parser(Pair, {'id': '3', 'price': 'N/A', 'extra': 1})
+      self.assertIsInstance(r, tuple)
+      self.assertEqual(r, Pair(3, 0.0))
+      self.assertEqual(r._asdict(), {'id': 3, 'price': 0.0})
+
+    def test_inputs(self):
+      self.assertEqual(Parser(Pair, '{"id": "1", "price": "2"}'), Pair(1, 2.0))
+      self.assertEqual(Parser(Pair, ['1', '2']), Pair(1, 2.0))
+      self.assertEqual(Parser(Pair, {'price': 2}), Pair(None, 2.0))
+      r = Pair(1, 2.0)
+      self.assertIs(Parser(Pair, r), r)
+      with self.assertRaises(ValueError):
+        Parser(Pair, 5)
+
+    def test_nested_and_templates(self):
+      r = Parser(Outer, {'name': 'a', 'row': ['1', '2']})
+      self.assertEqual(r.row, Row(1, 2.0))
+      rows = Processor(Row).map([{'id': i} for i in range(3)])
+      self.assertEqual([x.id for x in rows], [0, 1, 2])
+      self.assertEqual(Parser.compile({'pairs': [Pair]})({'pairs': [{'id': '1'}]}), {'pairs': [Pair(1)]})
+      self.assertEqual(Parser.batch(Pair, [{'id': '1'}, ['2', '3']]), [Pair(1), Pair(2, 3.0)])
+
+    def test_pickle_and_json(self):
+      for r in (Parser(Row, dict(RECORD)), Pair(1, 2.0)):
+        self.assertEqual(pickle.loads(pickle.dumps(r)), r)
+      encoded = json.dumps(Parser(Outer, {'name': 'a', 'row': {'id': 1}}), cls=JSONEncoder)
+      self.assertEqual(json.loads(encoded), {'name': 'a', 'row': {'id': 1, 'price': None, 'tags': None, 'at': None}})
+
+    def test_bad_templates(self):
+      for template in ({'_id': int}, {'class': int}, {'a b': int}, {1: int}):
+        with self.assertRaises(ValueError):
+          Parser.record(template)
+      with self.assertRaises(TypeError):
+        Parser.record([int])
+      with self.assertRaises(ValueError):
+        Parser.record({'a': int}, kind='dict')
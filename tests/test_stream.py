@@ -0,0 +1,121 @@
+import unittest
+import io, os, json, tempfile, tracemalloc
+from morphit import Processor
+from morphit.stream import JsonLines, MappedLines
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+      self.lines = [json.dumps({'id': str(i), 'price': '$%d.50' % i}) for i in range(50)]
+      self.processor = Processor({'id': int, 'price': float})
+
+    def test_stream_chunk_boundaries(self):
+      data = ('\n'.join(self.lines) + '\n').encode()
+      # Tiny chunks force nearly every line to straddle a boundary
+      for chunksize in (1, 7, 64, 1 << 16):
+        res = list(self.processor.stream(io.BytesIO(data), chunksize=chunksize))
+        self.assertEqual(len(res), 50)
+        self.assertEqual(res[3], {'id': 3, 'price': 3.5})
+        self.assertEqual(res[-1], {'id': 49, 'price': 49.5})
+
+    def test_stream_long_lines(self):
+      # Lines spanning thousands of chunks are joined once
+      tags = ['t%d' % i for i in range(20000)]
+      long = json.dumps({'id': '7', 'tags': tags})
+      for data in [(long + '\n' + self.lines[1]).encode(), self.lines[1] + '\n' + long]:
+        fh = io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data)
+        res = list(JsonLines(fh, chunksize=16))
+        self.assertEqual(len(res), 2)
+        self.assertEqual([r['id'] for r in res if 'tags' in r], ['7'])
+        self.assertEqual([r for r in res if 'tags' in r][0]['tags'], tags)
+
+    def test_stream_text_file_without_trailing_newline(self):
+      res = list(self.processor.stream(io.StringIO('\n'.join(self.lines[:3])), chunksize=5))
+      self.assertEqual(res, [{'id': i, 'price': i + .5} for i in range(3)])
+
+    def test_stream_is_lazy(self):
+      fh = io.BytesIO(('\n'.join(self.lines)).encode())
+      records = iter(self.processor.stream(fh, chunksize=16))
+      self.assertEqual(next(records), {'id': 0, 'price': 0.5})
+      self.assertLess(fh.tell(), 64)
+
+    def test_stream_malformed(self):
+      data = '{"id": "1"}\n{"id": \n\n{"id": "2"}\nnope\n'
+      self.assertRaises(ValueError, list, self.processor.stream(io.StringIO(data)))
+      skipped = list(self.processor.stream(io.StringIO(data), errors='skip'))
+      self.assertEqual(skipped, [{'id': 1}, {'id': 2}])
+      stream = self.processor.stream(io.StringIO(data), errors='collect')
+      self.assertEqual(list(stream), [{'id': 1}, {'id': 2}])
+      self.assertEqual([(n, l) for n, l, e in stream.malformed], [(2, '{"id": '), (5, 'nope')])
+      self.assertRaises(ValueError, JsonLines, data, errors='ignore')
+
+    def test_stream_path_bounded_memory(self):
+      fd, path = tempfile.mkstemp(suffix='.jsonl')
+      try:
+        with os.fdopen(fd, 'w') as fh:
+          for _ in range(400):
+            fh.write('\n'.join(self.lines) + '\n')
+        size = os.path.getsize(path)
+        tracemalloc.start()
+        count = 0
+        for record in self.processor.stream(path, chunksize=4096):
+          count += 1
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertEqual(count, 20000)
+        self.assertLess(peak, size / 10)
+      finally:
+        os.remove(path)
+
+class TestMappedLines(unittest.TestCase):
+    def setUp(self):
+      self.dir = tempfile.mkdtemp()
+      self.path = os.path.join(self.dir, 'records.jsonl')
+      with open(self.path, 'w') as fh:
+        fh.write('{"id": "0"}\n\n  \n%s\n\t%s\r\n' % (' ' * 24, ' ' * 40))
+        fh.write('\n'.join(json.dumps({'id': str(i), 'price': '$%d.50' % i}) for i in range(1, 50)))
+      self.processor = Processor({'id': int, 'price': float})
+
+    def tearDown(self):
+      for name in os.listdir(self.dir):
+        os.remove(os.path.join(self.dir, name))
+      os.rmdir(self.dir)
+
+    def test_random_access(self):
+      with self.processor.open(self.path) as records:
+        self.assertEqual(len(records), 50)
+        self.assertEqual(records[0], {'id': 0})
+        self.assertEqual(records[3], {'id': 3, 'price': 3.5})
+        self.assertEqual(records[-1], {'id': 49, 'price': 49.5})
+        view = records[10:20:5]
+        self.assertEqual(len(view), 2)
+        self.assertEqual([r['id'] for r in view], [10, 15])
+        self.assertEqual(len(list(records)), 50)
+        self.assertRaises(IndexError, records.__getitem__, 50)
+      raw = MappedLines(self.path)
+      self.assertEqual(raw[1], {'id': '1', 'price': '$1.50'})
+      self.assertEqual(raw.line(0), b'{"id": "0"}')
+      raw.close()
+
+    def test_saved_index(self):
+      index = self.path + '.idx'
+      with MappedLines(self.path, index=True) as records:
+        offsets = records.offsets
+      self.assertTrue(os.path.exists(index))
+      with MappedLines(self.path, index=index) as records:
+        self.assertEqual(records.offsets, offsets)
+      # A stale index is rebuilt
+      with open(self.path, 'a') as fh:
+        fh.write('\n{"id": "50"}\n')
+      with MappedLines(self.path, index=True) as records:
+        self.assertEqual(len(records), 51)
+        self.assertEqual(records[50], {'id': '50'})
+
+    def test_malformed_and_empty(self):
+      with open(self.path, 'w') as fh:
+        fh.write('{"id": "1"}\nnope\n')
+      with MappedLines(self.path) as records:
+        self.assertEqual(records[0], {'id': '1'})
+        with self.assertRaises(ValueError):
+          records[-1]
+      open(self.path, 'w').close()
+      self.assertEqual(list(MappedLines(self.path)), [])
@@ -0,0 +1,105 @@
+import sys
+import threading
+import unittest
+from collections import OrderedDict
+from datetime import datetime
+from morphit import Parser, Processor, DateParser, Memo, FrozenProcessor
+
+THREADS = 16
+RECORDS = 300
+
+# Two date formats in turn make a shared DateParser switch format constantly
+def record(i):
+  return {
+    'id': str(i),
+    'price': '$%d,000.50' % i,
+    'at': '1517408265' if i % 2 else '2018-01-31T14:17:45Z',
+    'status': 't' if i % 3 else 'f',
+    'tags': '[1, "%d"]' % i,
+    'nested': {'n': 'N/A', 'x': str(i)},
+  }
+
+def template():
+  return {
+    'id': int,
+    'price': float,
+    'at': DateParser(),
+    'status': Memo(bool, size=4),
+    'tags': [str],
+    'nested': {'n': float, 'x': lambda x: int(x) * 10},
+  }
+
+class TestThreads(unittest.TestCase):
+    def setUp(self):
+      self.interval = sys.getswitchinterval()
+      # Switch threads as often as possible to shake out races
+      sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+      sys.setswitchinterval(self.interval)
+
+    def run_threads(self, convert):
+      expected = [Parser(template(), record(i)) for i in range(RECORDS)]
+      barrier = threading.Barrier(THREADS)
+      failures = []
+
+      def work():
+        barrier.wait()
+        try:
+          for i in range(RECORDS):
+            if convert(record(i)) != expected[i]:
+              failures.append(i)
+        except Exception as e:
+          failures.append(e)
+
+      threads = [threading.Thread(target=work) for _ in range(THREADS)]
+      for t in threads:
+        t.start()
+      for t in threads:
+        t.join()
+      self.assertEqual(failures, [])
+
+    def test_shared_frozen_processor(self):
+      shared = template()
+      frozen = Processor(shared).then(Processor({'id': lambda x: x})).freeze()
+      self.assertIsInstance(frozen, FrozenProcessor)
+      self.run_threads(frozen)
+      # Changing the caller's template doesn't reach the frozen copy
+      shared['id'] = str
+      self.assertEqual(frozen(record(1))['id'], 1)
+
+    def test_shared_compiled_template(self):
+      self.run_threads(Parser.compile(template(), inplace=False))
+
+    def test_frozen_is_immutable(self):
+      frozen = Processor({'a': float}).freeze()
+      with self.assertRaises(AttributeError):
+        frozen.templates = [int]
+      longer = frozen.then(str)
+      self.assertEqual(len(frozen.templates), 1)
+      self.assertEqual(longer({'a': '1'}), '{"a": 1.0}')
+      self.assertIs(frozen.freeze(), frozen)
+
+    def test_freeze_template_subclasses(self):
+      from morphit.frozen import freezeTemplate
+      inner = Processor({'n': int})
+      template = Processor.infer([{'a': '1'}])
+      template['deep'] = inner
+      frozen = freezeTemplate(OrderedDict([('t', template), ('l', [inner])]))
+      self.assertIsInstance(frozen, OrderedDict)
+      self.assertIs(type(frozen['t']), type(template))
+      self.assertIsNot(frozen['t'], template)
+      self.assertIsInstance(frozen['t']['deep'], FrozenProcessor)
+      self.assertIsInstance(frozen['l'][0], FrozenProcessor)
+      template['a'] = str
+      self.assertIs(frozen['t']['a'], int)
+
+    def test_thread_executor(self):
+      records = [record(i) for i in range(100)]
+      res = Processor(template()).map(records, workers=4, chunksize=7, executor='thread')
+      self.assertEqual([r['id'] for r in res], list(range(100)))
+      self.assertEqual(res[1]['at'], datetime.fromtimestamp(1517408265))
+      res = Parser.map({'id': int}, [{'id': '1'}, {'id': '2'}], workers=2, executor='thread')
+      self.assertEqual(res, [{'id': 1}, {'id': 2}])
+      with self.assertRaises(ValueError):
+        Processor(int).map([1], workers=2, executor='fiber')
@@ -0,0 +1,60 @@
+import unittest
+from datetime import datetime
+from morphit import Parser
+from morphit.vectorized import available, numpy
+
+VALUES = ['1.5', '$10,000.00', '-3', '', '2']
+EPOCHS = [1517408265, 1517408265547]
+
+class TestPythonEngine(unittest.TestCase):
+    def test_matches_parser(self):
+      for base in (float, int, bool):
+        self.assertEqual(Parser.array(base, VALUES, engine='python'), Parser([base], list(VALUES)))
+      self.assertEqual(Parser.array(datetime, EPOCHS, engine='python'),
+                       [datetime.fromtimestamp(1517408265), datetime.fromtimestamp(1517408265.547)])
+
+    def test_bad_arguments(self):
+      with self.assertRaises(TypeError):
+        Parser.array(str, VALUES)
+      with self.assertRaises(ValueError):
+        Parser.array(float, VALUES, engine='cuda')
+
+    @unittest.skipIf(available(), 'numpy is installed')
+    def test_without_numpy(self):
+      self.assertEqual(Parser.array(float, VALUES), [1.5, 10000.0, -3.0, 0.0, 2.0])
+      with self.assertRaises(ImportError):
+        Parser.array(float, VALUES, engine='numpy')
+
+@unittest.skipUnless(available(), 'numpy is not installed')
+class TestNumpyEngine(unittest.TestCase):
+    def test_numbers(self):
+      np = numpy()
+      res = Parser.array(float, VALUES)
+      self.assertEqual(res.dtype, np.float64)
+      self.assertEqual(res.tolist(), [1.5, 10000.0, -3.0, 0.0, 2.0])
+      self.assertEqual(Parser.array(int, VALUES).tolist(), [1, 10000, -3, 0, 2])
+      # float() would read these differently, they keep the cleanup rules
+      self.assertEqual(Parser.array(float, ['1e5', ' 2', '3']).tolist(), Parser([float], ['1e5', ' 2', '3']))
+      self.assertEqual(Parser.array(int, np.array(['1.7', '-1.7'])).tolist(), [1, -1])
+      # Mixed kinds go through Parser element by element
+      self.assertEqual(Parser.array(float, [1, None, '2', 2.5]).tolist(), [1.0, 0.0, 2.0, 2.5])
+
+    def test_bools(self):
+      np = numpy()
+      strings = ['True', 't', 'true', '0', '1.0']
+      self.assertEqual(Parser.array(bool, strings).tolist(), Parser([bool], list(strings)))
+      self.assertEqual(Parser.array(bool, np.array([0, 2, 0])).tolist(), [False, True, False])
+      expected = Parser([bool], strings)
+      self.assertEqual(Parser.array(bool, np.array(strings)).tolist(), expected)
+      self.assertEqual(Parser.array(bool, np.array(strings, dtype='S')).tolist(), expected)
+
+    def test_epochs(self):
+      np = numpy()
+      expected = np.array(['2018-01-31T14:17:45', '2018-01-31T14:17:45.547'], dtype='datetime64[us]')
+      for values in (EPOCHS, np.array(EPOCHS)):
+        res = Parser.array(datetime, values)
+        self.assertEqual(res.dtype, np.dtype('datetime64[us]'))
+        self.assertEqual(res.tolist(), expected.tolist())
+      self.assertEqual(Parser.array(datetime, [1517408265.5]).tolist(), [datetime(2018, 1, 31, 14, 17, 45, 500000)])
+      self.assertEqual(Parser.array(datetime, [1517408265, '2018-01-31T14:17:45Z']).tolist(),
+                       [datetime(2018, 1, 31, 14, 17, 45)] * 2)